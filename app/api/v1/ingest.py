@@ -1,39 +1,63 @@
+import json
 from datetime import datetime
-from typing import Optional
-from fastapi import APIRouter, UploadFile, File, Form, Depends, Request
+from functools import partial
+from typing import Dict, List, Optional
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, Request, Response, status
+from pydantic import TypeAdapter, ValidationError
 from app.core.config import Settings, get_settings
 from app.utils.auth_utils import get_organization_id
 from app.utils.audio_validator import AudioValidator
-from app.services.storage_service import StorageService
 from app.services.pipeline import TranscriptionJob
-from app.schemas.ingest import IngestResponse
+from app.schemas.ingest import IngestResponse, BatchManifestEntry, BatchItemResult, BatchIngestResponse
+import structlog
 
+logger = structlog.get_logger("api.ingest")
 router = APIRouter()
 
 @router.post("/audio", response_model=IngestResponse, status_code=202)
 async def ingest_audio(
     request: Request,
+    response: Response,
     audio: UploadFile = File(...),
     node_id: str = Form(...),
     station_id: str = Form(...),
     recorded_at: Optional[datetime] = Form(None),
+    chunk_id: Optional[str] = Form(None, max_length=128, description="Client ID of this chunk; retransmits reuse it"),
     settings: Settings = Depends(get_settings),
     organization_id: str = Depends(get_organization_id)
 ):
     """
     Receives an audio chunk from a node, validates it, saves it, 
-    and enqueues it for transcription.
+    and enqueues it for transcription. Retransmits (same chunk ID or same
+    audio within the dedup window) return the original job instead.
     """
     received_at = datetime.now()
     
-    # 1. Validate
-    _info = AudioValidator.validate(audio, node_id, settings)
-    
-    audio.file.seek(0)
-    file_bytes = audio.file.read()
-    
-    # 2. Save to storage
-    audio_path = StorageService.save(file_bytes, node_id, organization_id, station_id, received_at, settings)
+    # 1. Validate the request itself
+    AudioValidator.validate_request(audio.content_type, node_id)
+
+    # 2. Dedup, then stream to storage while hashing and validate the audio
+    ingest = request.app.state.ingest
+    original, audio_path, sha256 = await ingest.admit(
+        organization_id, node_id, received_at, chunk_id,
+        partial(ingest.spool_stream, audio.file, organization_id),
+        priority=ingest.priority(node_id, station_id)
+    )
+    if original is not None:
+        response.status_code = 200
+        return IngestResponse(
+            status="duplicate",
+            node_id=node_id,
+            organization_id=organization_id,
+            station_id=station_id,
+            received_at=original.received_at,
+            queue_depth=request.app.state.queue.qsize(),
+            estimated_wait_seconds=ingest.estimated_wait(),
+            duplicate=True,
+            transcript_id=original.transcript_id,
+            chunk_id=chunk_id,
+            audio_sha256=sha256
+        )
     
     # 3. Enqueue for pipeline
     job = TranscriptionJob(
@@ -42,7 +66,9 @@ async def ingest_audio(
         station_id=station_id,
         received_at=received_at,
         recorded_at=recorded_at,
-        audio_path=audio_path
+        audio_path=audio_path,
+        audio_sha256=sha256,
+        chunk_id=chunk_id
     )
     
     queue_depth = request.app.state.queue.qsize()
@@ -54,5 +80,111 @@ async def ingest_audio(
         organization_id=organization_id,
         station_id=station_id,
         received_at=received_at,
-        queue_depth=queue_depth + 1
+        queue_depth=queue_depth + 1,
+        estimated_wait_seconds=ingest.estimated_wait(job),
+        chunk_id=chunk_id,
+        audio_sha256=sha256
+    )
+
+_manifest_adapter = TypeAdapter(List[BatchManifestEntry])
+
+@router.post("/batch", response_model=BatchIngestResponse, status_code=202)
+async def ingest_batch(
+    request: Request,
+    files: List[UploadFile] = File(..., description="Audio chunks, one multipart part each"),
+    manifest: Optional[str] = Form(None, description="JSON list of {file, recorded_at, chunk_id}, matched by filename"),
+    node_id: str = Form(...),
+    station_id: str = Form(...),
+    settings: Settings = Depends(get_settings),
+    organization_id: str = Depends(get_organization_id)
+):
+    """
+    Backfill for nodes reconnecting after an outage: many buffered chunks in
+    one request. Each chunk is deduplicated, validated and stored on its own
+    and reported per item; accepted chunks are enqueued together at backfill
+    priority, behind live traffic.
+    """
+    received_at = datetime.now()
+
+    if len(files) > settings.max_batch_files:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Too many files: {len(files)} (max {settings.max_batch_files})"
+        )
+
+    entries: Dict[str, BatchManifestEntry] = {}
+    if manifest:
+        try:
+            entries = {e.file: e for e in _manifest_adapter.validate_python(json.loads(manifest))}
+        except (ValueError, ValidationError) as e:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Invalid manifest: {e}"
+            )
+
+    ingest = request.app.state.ingest
+    ingest.ensure_capacity(organization_id, priority="backfill")
+
+    items: List[BatchItemResult] = []
+    jobs: List[TranscriptionJob] = []
+    try:
+        for upload in files:
+            filename = upload.filename or ""
+            meta = entries.get(filename) or BatchManifestEntry(file=filename)
+            try:
+                AudioValidator.validate_request(upload.content_type, node_id)
+                original, audio_path, sha256 = await ingest.admit(
+                    organization_id, node_id, received_at, meta.chunk_id,
+                    partial(ingest.spool_stream, upload.file, organization_id),
+                    pending=len(jobs),
+                    priority="backfill"
+                )
+            except HTTPException as e:
+                items.append(BatchItemResult(file=filename, chunk_id=meta.chunk_id, status="rejected", error=str(e.detail)))
+                continue
+            except Exception as e:
+                # admit() has released the chunk's dedup keys, so a retry is processed normally
+                logger.error("Batch item failed", file=filename, node_id=node_id, error=str(e), exc_info=True)
+                items.append(BatchItemResult(file=filename, chunk_id=meta.chunk_id, status="rejected", error="Internal error, retry later"))
+                continue
+
+            if original is not None:
+                items.append(BatchItemResult(
+                    file=filename, chunk_id=meta.chunk_id, status="duplicate",
+                    transcript_id=original.transcript_id, audio_sha256=sha256
+                ))
+                continue
+
+            jobs.append(TranscriptionJob(
+                node_id=node_id,
+                organization_id=organization_id,
+                station_id=station_id,
+                received_at=received_at,
+                recorded_at=meta.recorded_at,
+                audio_path=audio_path,
+                audio_sha256=sha256,
+                chunk_id=meta.chunk_id,
+                priority="backfill"
+            ))
+            items.append(BatchItemResult(file=filename, chunk_id=meta.chunk_id, status="queued", audio_sha256=sha256))
+    finally:
+        # Admitted chunks are pending in the dedup index; they must be queued
+        # even if the request is interrupted, or retransmits would be dropped
+        # as duplicates. Oldest recordings first, so backfilled transcripts
+        # arrive roughly in order.
+        jobs.sort(key=lambda j: j.recorded_at or received_at)
+        for job in jobs:
+            request.app.state.queue.put_nowait(job)
+
+    return BatchIngestResponse(
+        node_id=node_id,
+        organization_id=organization_id,
+        station_id=station_id,
+        received_at=received_at,
+        queue_depth=request.app.state.queue.qsize(),
+        estimated_wait_seconds=ingest.estimated_wait(jobs[0] if jobs else None),
+        queued=sum(1 for i in items if i.status == "queued"),
+        duplicates=sum(1 for i in items if i.status == "duplicate"),
+        rejected=sum(1 for i in items if i.status == "rejected"),
+        items=items
     )
@@ -1,23 +1,24 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, desc
-from app.db.database import get_db_session
+from app.db.database import get_async_db_session
 from app.utils.auth_utils import get_organization_id
 from app.models.dbmodels import Node
-from app.schemas.node import NodeOut
+from app.schemas.node import NodeOut, NodeStats, ActivityBucket
+from app.services.node_stats_service import NodeStatsService
 import structlog
 
 logger = structlog.get_logger("api.nodes")
 router = APIRouter()
 
 @router.get("/", response_model=List[NodeOut])
-def list_nodes(
-    db: Session = Depends(get_db_session),
+async def list_nodes(
+    db: AsyncSession = Depends(get_async_db_session),
     organization_id: str = Depends(get_organization_id)
 ):
     stmt = select(Node).where(Node.organization_id == organization_id).order_by(desc(Node.last_seen_at))
-    nodes = db.execute(stmt).scalars().all()
+    nodes = (await db.execute(stmt)).scalars().all()
     
     return [
         NodeOut(
@@ -30,14 +31,23 @@ def list_nodes(
         ) for n in nodes
     ]
 
+@router.get("/stats", response_model=List[NodeStats])
+async def list_node_stats(
+    station_id: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db_session),
+    organization_id: str = Depends(get_organization_id)
+):
+    """Transcript and audio totals for every node, read from the maintained counters."""
+    return await NodeStatsService.get_all(db, organization_id, station_id=station_id)
+
 @router.get("/{node_id}", response_model=NodeOut)
-def get_node(
+async def get_node(
     node_id: str,
-    db: Session = Depends(get_db_session),
+    db: AsyncSession = Depends(get_async_db_session),
     organization_id: str = Depends(get_organization_id)
 ):
     stmt = select(Node).where(Node.id == node_id, Node.organization_id == organization_id)
-    n = db.execute(stmt).scalar_one_or_none()
+    n = (await db.execute(stmt)).scalar_one_or_none()
     
     if not n:
         raise HTTPException(status_code=404, detail="Node not found")
@@ -50,3 +60,26 @@ def get_node(
         last_seen_at=n.last_seen_at, # type: ignore
         transcript_count=n.transcript_count
     )
+
+@router.get("/{node_id}/stats", response_model=NodeStats)
+async def get_node_stats(
+    node_id: str,
+    db: AsyncSession = Depends(get_async_db_session),
+    organization_id: str = Depends(get_organization_id)
+):
+    result = await NodeStatsService.get_one(db, organization_id, node_id)
+    
+    if not result:
+        raise HTTPException(status_code=404, detail="Node not found")
+        
+    return result
+
+@router.get("/{node_id}/activity", response_model=List[ActivityBucket])
+async def get_node_activity(
+    node_id: str,
+    hours: int = Query(24, ge=1, le=24 * 31),
+    db: AsyncSession = Depends(get_async_db_session),
+    organization_id: str = Depends(get_organization_id)
+):
+    """Hourly transcript counts and audio seconds for the last `hours` hours."""
+    return await NodeStatsService.get_activity(db, organization_id, node_id, hours=hours)
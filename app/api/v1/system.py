@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, Request
+from app.utils.auth_utils import verify_api_key
+
+router = APIRouter()
+
+@router.get("/stats")
+def pipeline_stats(
+    request: Request,
+    _ = Depends(verify_api_key)
+):
+    """Runtime metrics for the processing pipeline."""
+    return {
+        "executors": request.app.state.executors.stats(),
+        "llm_pool": request.app.state.llm_client.stats(),
+        "llm_cache": request.app.state.post_processor.cache.stats(),
+        "triage": request.app.state.post_processor.triage.stats(),
+        "writer": request.app.state.writer.stats(),
+        "dedup": request.app.state.dedup.stats(),
+        "queues": {
+            "transcription": request.app.state.queue.qsize(),
+            "analysis": request.app.state.analysis_queue.qsize(),
+            "analysis_capacity": request.app.state.analysis_queue.maxsize,
+        },
+        "scheduler": request.app.state.queue.stats(),
+    }
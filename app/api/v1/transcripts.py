@@ -1,74 +1,170 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Literal, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from app.db.database import get_db_session
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_async_db_session
 from app.utils.auth_utils import get_organization_id
 from app.services.transcripts_service import TranscriptsService
-from app.schemas.transcript import TranscriptOut
+from app.schemas.transcript import TranscriptOut, TranscriptDetail, TranscriptPage, SearchResult, WordTiming
 import structlog
 
 logger = structlog.get_logger("api.transcripts")
 router = APIRouter()
 
-@router.get("/", response_model=List[TranscriptOut])
-def list_org_transcripts(
+def _cursor(cursor: Optional[str]) -> Optional[int]:
+    if cursor is None:
+        return None
+    if not cursor.isdigit():
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return int(cursor)
+
+@router.get("/", response_model=TranscriptPage)
+async def list_org_transcripts(
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db_session),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    since: Optional[datetime] = Query(None, description="received_at >= since"),
+    until: Optional[datetime] = Query(None, description="received_at < until"),
+    db: AsyncSession = Depends(get_async_db_session),
     organization_id: str = Depends(get_organization_id)
 ):
-    """List all transcripts for the current organization."""
-    results = TranscriptsService.get_by_org(db, organization_id, limit=limit)
-    return [TranscriptOut.model_validate(r) for r in results]
+    """List all transcripts for the current organization, newest first."""
+    return await TranscriptsService.get_by_org(
+        db, organization_id, limit=limit, cursor=_cursor(cursor), since=since, until=until
+    )
 
-@router.get("/station/{station_id}", response_model=List[TranscriptOut])
-def list_station_transcripts(
+@router.get("/station/{station_id}", response_model=TranscriptPage)
+async def list_station_transcripts(
     station_id: str,
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db_session),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    since: Optional[datetime] = Query(None, description="received_at >= since"),
+    until: Optional[datetime] = Query(None, description="received_at < until"),
+    db: AsyncSession = Depends(get_async_db_session),
     organization_id: str = Depends(get_organization_id)
 ):
-    """List all transcripts for a specific station within the organization."""
-    results = TranscriptsService.get_by_station(db, organization_id, station_id, limit=limit)
-    return [TranscriptOut.model_validate(r) for r in results]
+    """List all transcripts for a specific station within the organization, newest first."""
+    return await TranscriptsService.get_by_station(
+        db, organization_id, station_id, limit=limit, cursor=_cursor(cursor), since=since, until=until
+    )
 
-@router.get("/node/{node_id}", response_model=List[TranscriptOut])
-def list_node_transcripts(
+@router.get("/node/{node_id}", response_model=TranscriptPage)
+async def list_node_transcripts(
     node_id: str,
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db_session),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    since: Optional[datetime] = Query(None, description="received_at >= since"),
+    until: Optional[datetime] = Query(None, description="received_at < until"),
+    db: AsyncSession = Depends(get_async_db_session),
     organization_id: str = Depends(get_organization_id)
 ):
-    """List all transcripts for a specific node within the organization."""
-    results = TranscriptsService.get_by_node(db, organization_id, node_id, limit=limit)
-    return [TranscriptOut.model_validate(r) for r in results]
+    """List all transcripts for a specific node within the organization, newest first."""
+    return await TranscriptsService.get_by_node(
+        db, organization_id, node_id, limit=limit, cursor=_cursor(cursor), since=since, until=until
+    )
 
-@router.get("/search", response_model=List[TranscriptOut])
-def search_transcripts(
+@router.get("/search", response_model=List[SearchResult])
+async def search_transcripts(
     q: str = Query(..., min_length=1),
     limit: int = Query(5, ge=1, le=20),
-    db: Session = Depends(get_db_session),
+    db: AsyncSession = Depends(get_async_db_session),
+    organization_id: str = Depends(get_organization_id)
+):
+    """
+    Ranked full-text search. Supports "quoted phrases", `or`, `-exclusions`
+    and prefix terms such as `gulb*`.
+    """
+    return await TranscriptsService.search(db, organization_id, q, limit=limit)
+
+@router.get("/search/fuzzy", response_model=List[SearchResult])
+async def fuzzy_search_transcripts(
+    q: str = Query(..., min_length=3),
+    station_id: Optional[str] = Query(None),
+    threshold: float = Query(0.5, ge=0.1, le=1.0),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db_session),
+    organization_id: str = Depends(get_organization_id)
+):
+    """
+    Similarity-ranked trigram search for near misses, e.g. a garbled
+    call-sign or street name ("it sounded like 'Gulberg'").
+    """
+    return await TranscriptsService.fuzzy_search(
+        db, organization_id, q, station_id=station_id, threshold=threshold, limit=limit
+    )
+
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+@router.get("/export")
+async def export_transcripts(
+    since: datetime = Query(..., description="received_at >= since"),
+    until: Optional[datetime] = Query(None, description="received_at < until (default: now)"),
+    station_id: Optional[str] = Query(None),
+    node_id: Optional[str] = Query(None),
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+    gzip: bool = Query(False),
     organization_id: str = Depends(get_organization_id)
 ):
-    """Search transcripts by text content using fuzzy matching (ILIKE)."""
-    results = TranscriptsService.search(db, organization_id, q, limit=limit)
-    return [TranscriptOut.model_validate(r) for r in results]
+    """
+    Bulk export of a time range as NDJSON or CSV, streamed with constant memory.
+    """
+    until = until or datetime.now()
+    if until <= since:
+        raise HTTPException(status_code=400, detail="until must be after since")
+
+    filename = f"transcripts_{organization_id}_{since:%Y%m%dT%H%M%S}_{until:%Y%m%dT%H%M%S}.{format}"
+    if gzip:
+        filename += ".gz"
+
+    return StreamingResponse(
+        TranscriptsService.export(
+            organization_id, since, until,
+            station_id=station_id, node_id=node_id, fmt=format, compress=gzip
+        ),
+        media_type="application/gzip" if gzip else EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 @router.get("/{transcript_id}", response_model=TranscriptOut)
-def get_transcript(
+async def get_transcript(
     transcript_id: int,
-    db: Session = Depends(get_db_session),
+    db: AsyncSession = Depends(get_async_db_session),
     organization_id: str = Depends(get_organization_id)
 ):
     """Get a single transcript by ID."""
-    from sqlalchemy import select
-    from app.models.dbmodels import Transcript
-    stmt = select(Transcript).where(
-        Transcript.id == transcript_id, 
-        Transcript.organization_id == organization_id
-    )
-    result = db.execute(stmt).scalar_one_or_none()
+    result = await TranscriptsService.get_one(db, organization_id, transcript_id)
     
     if not result:
         raise HTTPException(status_code=404, detail="Transcript not found")
         
-    return TranscriptOut.model_validate(result)
+    return result
+
+@router.get("/{transcript_id}/detail", response_model=TranscriptDetail)
+async def get_transcript_detail(
+    transcript_id: int,
+    db: AsyncSession = Depends(get_async_db_session),
+    organization_id: str = Depends(get_organization_id)
+):
+    """Get a transcript with its segments, word timings and LLM analysis."""
+    result = await TranscriptsService.get_detail(db, organization_id, transcript_id)
+    
+    if not result:
+        raise HTTPException(status_code=404, detail="Transcript not found")
+        
+    return result
+
+@router.get("/{transcript_id}/words", response_model=List[WordTiming])
+async def get_transcript_words(
+    transcript_id: int,
+    start: Optional[float] = Query(None, ge=0, description="Seconds from the start of the clip"),
+    end: Optional[float] = Query(None, ge=0, description="Seconds from the start of the clip"),
+    db: AsyncSession = Depends(get_async_db_session),
+    organization_id: str = Depends(get_organization_id)
+):
+    """Get the word timings of a transcript, optionally limited to a time range."""
+    result = await TranscriptsService.get_words(db, organization_id, transcript_id, start=start, end=end)
+    
+    if result is None:
+        raise HTTPException(status_code=404, detail="Transcript not found")
+        
+    return result
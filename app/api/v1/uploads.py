@@ -0,0 +1,175 @@
+from datetime import datetime
+from functools import partial
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from app.core.config import Settings, get_settings
+from app.utils.auth_utils import get_organization_id
+from app.utils.audio_validator import AudioValidator
+from app.services.pipeline import TranscriptionJob
+from app.schemas.ingest import IngestResponse, UploadCreate, UploadStatus
+
+router = APIRouter()
+
+def _status(state: dict) -> UploadStatus:
+    return UploadStatus(
+        upload_id=state["upload_id"],
+        offset=state["offset"],
+        length=state["length"],
+        expires_at=state["expires_at"]
+    )
+
+async def _require(request: Request, organization_id: str, upload_id: str) -> dict:
+    state = await request.app.state.uploads.get(organization_id, upload_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return state
+
+@router.post("/", response_model=UploadStatus, status_code=201)
+async def create_upload(
+    request: Request,
+    response: Response,
+    body: UploadCreate,
+    settings: Settings = Depends(get_settings),
+    organization_id: str = Depends(get_organization_id)
+):
+    """
+    Starts a resumable upload. Send the audio with PATCH requests carrying
+    `Upload-Offset`, then POST `/complete`.
+    """
+    AudioValidator.validate_request(body.content_type, body.node_id)
+    AudioValidator.check_size(body.length, settings)
+    # Refuse before the node spends airtime on an upload that can't be queued
+    ingest = request.app.state.ingest
+    ingest.ensure_capacity(organization_id, priority=ingest.priority(body.node_id, body.station_id))
+
+    state = await request.app.state.uploads.create(organization_id, body.model_dump(mode="json"))
+    response.headers["Location"] = f"{request.url.path.rstrip('/')}/{state['upload_id']}"
+    return _status(state)
+
+@router.head("/{upload_id}")
+async def upload_offset(
+    upload_id: str,
+    request: Request,
+    organization_id: str = Depends(get_organization_id)
+):
+    """Current offset as `Upload-Offset`, for resuming after a dropped connection."""
+    state = await _require(request, organization_id, upload_id)
+    return Response(headers={
+        "Upload-Offset": str(state["offset"]),
+        "Upload-Length": str(state["length"]),
+        "Cache-Control": "no-store"
+    })
+
+@router.get("/{upload_id}", response_model=UploadStatus)
+async def get_upload(
+    upload_id: str,
+    request: Request,
+    organization_id: str = Depends(get_organization_id)
+):
+    return _status(await _require(request, organization_id, upload_id))
+
+@router.patch("/{upload_id}", status_code=204)
+async def append_upload(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    organization_id: str = Depends(get_organization_id)
+):
+    """
+    Appends the raw request body at `Upload-Offset`. The body is streamed
+    straight to the spool file; bytes received before a disconnect are kept.
+    """
+    offset = await request.app.state.uploads.append(organization_id, upload_id, upload_offset, request.stream())
+    return Response(status_code=204, headers={"Upload-Offset": str(offset)})
+
+@router.delete("/{upload_id}", status_code=204)
+async def abort_upload(
+    upload_id: str,
+    request: Request,
+    organization_id: str = Depends(get_organization_id)
+):
+    uploads = request.app.state.uploads
+    async with uploads.lock(upload_id):
+        await _require(request, organization_id, upload_id)
+        await uploads.remove(organization_id, upload_id)
+    return Response(status_code=204)
+
+@router.post("/{upload_id}/complete", response_model=IngestResponse, status_code=202)
+async def complete_upload(
+    upload_id: str,
+    request: Request,
+    response: Response,
+    organization_id: str = Depends(get_organization_id)
+):
+    """
+    Finalizes a fully received upload through the regular ingest path:
+    dedup, validation, content-addressed storage and the transcription queue.
+    """
+    uploads = request.app.state.uploads
+    ingest = request.app.state.ingest
+    received_at = datetime.now()
+
+    async with uploads.lock(upload_id):
+        state = await _require(request, organization_id, upload_id)
+        if state["offset"] != state["length"]:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Upload incomplete: {state['offset']} of {state['length']} bytes",
+                headers={"Upload-Offset": str(state["offset"])}
+            )
+
+        node_id, station_id, chunk_id = state["node_id"], state["station_id"], state["chunk_id"]
+        try:
+            original, audio_path, sha256 = await ingest.admit(
+                organization_id, node_id, received_at, chunk_id,
+                partial(ingest.hash_spooled, uploads.spool_path(organization_id, upload_id)),
+                priority=ingest.priority(node_id, station_id)
+            )
+        except BaseException:
+            # Rejected audio has been discarded; an upload refused by admission
+            # control is kept so the node can retry /complete after Retry-After
+            await uploads.remove_consumed(organization_id, upload_id)
+            raise
+        # The spool file has been stored or discarded by now
+        await uploads.remove(organization_id, upload_id)
+
+    if original is not None:
+        response.status_code = 200
+        return IngestResponse(
+            status="duplicate",
+            node_id=node_id,
+            organization_id=organization_id,
+            station_id=station_id,
+            received_at=original.received_at,
+            queue_depth=request.app.state.queue.qsize(),
+            estimated_wait_seconds=ingest.estimated_wait(),
+            duplicate=True,
+            transcript_id=original.transcript_id,
+            chunk_id=chunk_id,
+            audio_sha256=sha256
+        )
+
+    job = TranscriptionJob(
+        node_id=node_id,
+        organization_id=organization_id,
+        station_id=station_id,
+        received_at=received_at,
+        recorded_at=datetime.fromisoformat(state["recorded_at"]) if state["recorded_at"] else None,
+        audio_path=audio_path,
+        audio_sha256=sha256,
+        chunk_id=chunk_id
+    )
+
+    queue_depth = request.app.state.queue.qsize()
+    await request.app.state.queue.put(job)
+
+    return IngestResponse(
+        status="queued",
+        node_id=node_id,
+        organization_id=organization_id,
+        station_id=station_id,
+        received_at=received_at,
+        queue_depth=queue_depth + 1,
+        estimated_wait_seconds=ingest.estimated_wait(job),
+        chunk_id=chunk_id,
+        audio_sha256=sha256
+    )
@@ -1,10 +1,21 @@
 import os
 from pathlib import Path
+from typing import Dict, List
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     # Database
     postgres_dsn: str = ""
+    db_pool_size: int = 10                # async engine connections kept open
+    db_max_overflow: int = 10             # extra connections allowed under burst
+    db_statement_cache_size: int = 256    # asyncpg prepared statements cached per connection
+
+    # Transcript partitioning and retention
+    partition_months: int = 1             # months of received_at per transcripts partition
+    partition_premake: int = 3            # future partitions created ahead of time
+    partition_maintenance_hours: float = 6.0   # how often partitions are created and retired
+    retention_months: int = 0             # drop partitions older than this (0 = keep forever)
+    retention_action: str = "drop"        # "drop" or "detach" (keep the table for archiving)
 
     # Storage
     audio_dir: Path = Path("data/audio")
@@ -20,6 +31,13 @@ class Settings(BaseSettings):
     beam_size: int = 5
     compute_type: str = "int8"            # int8 / float16 / bfloat16
     device: str = "cpu"                   # cpu / cuda
+    whisper_shared_model: bool = False    # one model for all threads instead of one copy per thread
+    whisper_num_workers: int = 0          # CTranslate2 workers for the shared model (0 = transcription_workers)
+    whisper_cpu_threads: int = 0          # CTranslate2 intra-op threads per worker (0 = library default)
+
+    # Cross-job batching (1 = disabled, each job transcribed on its own)
+    transcription_batch_size: int = 1     # max jobs (and clips per forward pass) in one batch
+    transcription_batch_wait_ms: int = 50 # max time to wait for a batch to fill
     
     # Advanced Transcription Options
     whisper_language: str | None = None   # Hardcode to "en" for speed/accuracy if known
@@ -34,10 +52,52 @@ class Settings(BaseSettings):
     llm_n_gpu_layers: int = 0             # Set > 0 for GPU offloading
     llm_temperature: float = 0.1
     llm_max_tokens: int = 512
+    llm_pool_size: int = 0                # llama.cpp contexts in the pool (0 = llm_workers, never more)
+    llm_pool_memory_mb: int = 0           # budget for KV caches + GPU-offloaded weights of the pool (0 = unlimited)
+
+    # LLM result cache
+    llm_cache_size: int = 10_000          # in-memory entries (0 disables the cache)
+    llm_cache_ttl_seconds: int = 86_400
+    llm_cache_persist: bool = False       # also keep entries in the llm_analysis_cache table
+
+    # Pre-LLM triage
+    triage_enabled: bool = True           # route routine traffic around the LLM
+    triage_org_overrides: Dict[str, bool] = {}  # per-organization on/off, e.g. {"rescue": false}
+    triage_max_routine_words: int = 12    # longer transmissions always go to the LLM
+    triage_extra_keywords: List[str] = [] # additional incident terms (call-signs, local codes)
+
+    # Stage executors
+    llm_workers: int = 1                  # concurrent llama.cpp calls
+    analysis_queue_size: int = 1000       # transcripts waiting for the LLM stage; transcription waits when full
+    analysis_recovery_hours: float = 24.0 # on startup, re-queue unanalyzed transcripts this recent (0 disables)
+    io_workers: int = 4                   # threads for blocking file and DB work
+
+    # Write-behind transcript persistence
+    persist_batch_size: int = 100         # rows per multi-row INSERT
+    persist_flush_ms: int = 50            # max time a finished transcript waits in the buffer
 
     # Ingest limits
     max_audio_duration_seconds: int = 60
     max_audio_size_bytes: int = 10_485_760   # 10 MB
+    max_batch_files: int = 500               # chunks per /ingest/batch request
+    upload_ttl_hours: float = 24.0           # unfinished resumable uploads are discarded after this
+
+    # Admission control (0 disables a limit)
+    queue_max_depth: int = 1000           # queued transcription jobs before ingest returns 503
+    queue_live_reserve: float = 0.2       # share of queue_max_depth only live and emergency traffic may fill
+    queue_max_wait_seconds: float = 0     # estimated wait for the work queued ahead before ingest returns 503
+    queue_org_quota: int = 0              # queued jobs per organization before ingest returns 429
+    queue_org_quotas: Dict[str, int] = {} # per-organization overrides, e.g. {"police": 200}
+
+    # Scheduling
+    queue_org_weights: Dict[str, float] = {}   # fair-share weight per organization (default 1), e.g. {"rescue": 2}
+    queue_fair_by_station: bool = False        # share within a class per station instead of per organization
+    emergency_nodes: List[str] = []            # live traffic from these nodes is served ahead of all other traffic
+    emergency_stations: List[str] = []         # same for every node of these stations
+
+    # Retransmit dedup
+    dedup_window_seconds: int = 3600      # same hash or chunk ID within this window is a duplicate (0 disables)
+    dedup_max_entries: int = 100_000      # in-memory index size; older entries fall back to the DB lookup
 
     # API
     api_key: str = "echo_hq_key"
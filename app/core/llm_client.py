@@ -1,57 +1,247 @@
+import json
+import queue
 import threading
+import time
 import structlog
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, Optional
-from llama_cpp import Llama, LlamaGrammar
+from typing import Any, Dict, Iterator, List, Optional
+from llama_cpp import Llama, LlamaGrammar, LlamaState
 
 logger = structlog.get_logger("llm_client")
 
+class LlamaContext:
+    """
+    One llama.cpp context plus the prompt-prefix state evaluated on it.
+    A context is used by a single thread at a time.
+    """
+    def __init__(self, model: Llama):
+        self.model = model
+        self.prefix_text: Optional[str] = None
+        self.prefix_tokens: List[int] = []
+        self.prefix_state: Optional[LlamaState] = None
+
 class LlamaClient:
+    """
+    Pool of llama.cpp contexts so several transcripts can be analyzed at once.
+
+    Contexts are created lazily up to `llm_pool_size` (default and maximum:
+    `llm_workers`, the LLM executor's thread count) and capped by
+    `llm_pool_memory_mb`. On CPU the weights are mmapped and shared, so an
+    extra context costs its KV cache; with GPU offload every context uploads
+    its own copy of the offloaded layers, which the budget counts too.
+    """
     def __init__(self, settings: Any):
         self.settings = settings
         self.model_path = str(settings.llm_model_path) if settings.llm_model_path else None
-        self._model: Optional[Llama] = None
+        self._pool: "queue.Queue[LlamaContext]" = queue.Queue()
         self._lock = threading.Lock()
+        self._grammars: Dict[str, LlamaGrammar] = {}
 
-    def _get_model(self) -> Llama:
-        with self._lock:
-            if self._model is None:
-                if not self.model_path or not Path(self.model_path).exists():
-                    logger.error("LLM model path not found or not configured", path=self.model_path)
-                    raise ValueError(f"LLM model path {self.model_path} does not exist.")
-
-                logger.info("Loading llama.cpp model", 
-                            path=self.model_path, 
-                            n_ctx=self.settings.llm_n_ctx,
-                            gpu_layers=self.settings.llm_n_gpu_layers)
-                
-                self._model = Llama(
-                    model_path=self.model_path,
+        self.capacity = self._initial_capacity(settings)
+        self._size = 0
+        self._context_bytes = 0
+        self._gpu_weight_bytes = 0
+
+        # Checkout metrics
+        self._checkouts = 0
+        self._in_use = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @staticmethod
+    def _initial_capacity(settings: Any) -> int:
+        workers = max(1, settings.llm_workers)
+        capacity = settings.llm_pool_size or workers
+        if capacity > workers:
+            # Only llm_workers threads ever run llama.cpp calls
+            logger.warning("LLM pool size exceeds the LLM executor; extra contexts would sit idle",
+                           requested=capacity, llm_workers=workers)
+            capacity = workers
+        if capacity > 1 and settings.llm_n_gpu_layers != 0 and not settings.llm_pool_memory_mb:
+            logger.warning("Each GPU-offloaded context loads its own copy of the weights; "
+                           "set ECHO_LLM_POOL_MEMORY_MB to run more than one",
+                           requested=capacity, gpu_layers=settings.llm_n_gpu_layers)
+            capacity = 1
+        return max(1, capacity)
+
+    def _load_context(self) -> LlamaContext:
+        if not self.model_path or not Path(self.model_path).exists():
+            logger.error("LLM model path not found or not configured", path=self.model_path)
+            raise ValueError(f"LLM model path {self.model_path} does not exist.")
+
+        logger.info("Loading llama.cpp context", 
+                    path=self.model_path, 
                     n_ctx=self.settings.llm_n_ctx,
-                    n_gpu_layers=self.settings.llm_n_gpu_layers,
-                    verbose=False
-                )
-            return self._model
+                    gpu_layers=self.settings.llm_n_gpu_layers,
+                    pool_size=self._size)
+        
+        model = Llama(
+            model_path=self.model_path,
+            n_ctx=self.settings.llm_n_ctx,
+            n_gpu_layers=self.settings.llm_n_gpu_layers,
+            verbose=False
+        )
+        return LlamaContext(model)
+
+    @staticmethod
+    def _estimate_context_bytes(model: Llama) -> int:
+        """
+        KV-cache size of one context (f16 K and V for every layer), from GGUF metadata.
+        """
+        try:
+            meta = model.metadata
+            arch = meta.get("general.architecture", "llama")
+            n_layer = int(meta[f"{arch}.block_count"])
+            n_embd = int(meta[f"{arch}.embedding_length"])
+            n_head = int(meta[f"{arch}.attention.head_count"])
+            n_head_kv = int(meta.get(f"{arch}.attention.head_count_kv", n_head))
+        except (KeyError, ValueError):
+            return 0
+        return 2 * n_layer * model.n_ctx() * (n_embd // n_head) * n_head_kv * 2
 
-    def generate_structured(self, prompt: str, grammar_text: str) -> Dict[str, Any]:
+    def _offloaded_weight_bytes(self, model: Llama) -> int:
+        """
+        Weights a context uploads to the GPU: the share of the model file in the
+        offloaded layers (all of it when the layer count is unknown).
+        """
+        n_gpu_layers = self.settings.llm_n_gpu_layers
+        if n_gpu_layers == 0:
+            return 0
+        size = Path(self.model_path).stat().st_size
+        try:
+            arch = model.metadata.get("general.architecture", "llama")
+            n_layer = int(model.metadata[f"{arch}.block_count"])
+        except (KeyError, ValueError):
+            return size
+        if n_gpu_layers < 0 or n_gpu_layers >= n_layer:
+            return size
+        return size * n_gpu_layers // n_layer
+
+    def _apply_memory_budget(self, ctx: LlamaContext):
+        self._gpu_weight_bytes = self._offloaded_weight_bytes(ctx.model)
+        self._context_bytes = self._estimate_context_bytes(ctx.model) + self._gpu_weight_bytes
+        budget = self.settings.llm_pool_memory_mb * 1024 * 1024
+        if budget and self._context_bytes:
+            fits = max(1, budget // self._context_bytes)
+            if fits < self.capacity:
+                logger.warning("LLM pool capped by memory budget",
+                               requested=self.capacity,
+                               capacity=fits,
+                               context_mb=round(self._context_bytes / 1024 / 1024, 1))
+                self.capacity = fits
+
+    def _acquire(self) -> LlamaContext:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            grow = self._size < self.capacity
+            if grow:
+                self._size += 1
+            first = self._size == 1
+
+        if not grow:
+            return self._pool.get()
+
+        try:
+            ctx = self._load_context()
+        except Exception:
+            with self._lock:
+                self._size -= 1
+            raise
+        if grow and first:
+            self._apply_memory_budget(ctx)
+        return ctx
+
+    @contextmanager
+    def _checkout(self) -> Iterator[LlamaContext]:
+        started_at = time.monotonic()
+        ctx = self._acquire()
+        wait = time.monotonic() - started_at
+        with self._lock:
+            self._checkouts += 1
+            self._in_use += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+        try:
+            yield ctx
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._pool.put(ctx)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "capacity": self.capacity,
+                "loaded": self._size,
+                "in_use": self._in_use,
+                "checkouts": self._checkouts,
+                "avg_wait_ms": round(self._wait_total / (self._checkouts or 1) * 1000, 2),
+                "max_wait_ms": round(self._wait_max * 1000, 2),
+                "context_mb": round(self._context_bytes / 1024 / 1024, 1),
+                "gpu_weights_mb": round(self._gpu_weight_bytes / 1024 / 1024, 1),
+            }
+
+    def _get_grammar(self, grammar_text: str) -> LlamaGrammar:
+        """
+        Parses each distinct grammar once and keeps it for later calls.
+        """
+        grammar = self._grammars.get(grammar_text)
+        if grammar is None:
+            logger.info("Compiling GBNF grammar")
+            grammar = LlamaGrammar.from_string(grammar_text, verbose=False)
+            self._grammars[grammar_text] = grammar
+        return grammar
+
+    @staticmethod
+    def _restore_prefix(ctx: LlamaContext, prefix: str):
+        """
+        Makes sure the KV cache starts with the evaluated `prefix`, so generation
+        only has to evaluate the tokens after it. The prefix is evaluated once and
+        its state snapshotted; the snapshot is restored only when the context no
+        longer holds the prefix (llama.cpp reuses a matching cached prefix itself).
+        """
+        model = ctx.model
+        if prefix != ctx.prefix_text:
+            logger.info("Evaluating prompt prefix for KV reuse")
+            tokens = model.tokenize(prefix.encode("utf-8"))
+            model.reset()
+            model.eval(tokens)
+            ctx.prefix_text = prefix
+            ctx.prefix_tokens = tokens
+            ctx.prefix_state = model.save_state()
+            return
+
+        n = len(ctx.prefix_tokens)
+        if model.n_tokens < n or list(model.input_ids[:n]) != ctx.prefix_tokens:
+            model.load_state(ctx.prefix_state)
+
+    def generate_structured(self, prompt: str, grammar_text: str, prefix: Optional[str] = None) -> Dict[str, Any]:
         """
         Generates a structured JSON response using GBNF grammar.
+        If `prompt` starts with a constant `prefix`, its cached KV state is reused.
         """
-        model = self._get_model()
-        grammar = LlamaGrammar.from_string(grammar_text)
+        grammar = self._get_grammar(grammar_text)
         
         logger.info("Generating structured LLM response")
         
-        response = model(
-            prompt,
-            max_tokens=self.settings.llm_max_tokens,
-            temperature=self.settings.llm_temperature,
-            grammar=grammar,
-            stop=["</s>", "Llama:", "User:"]
-        )
+        with self._checkout() as ctx:
+            if prefix and prompt.startswith(prefix):
+                self._restore_prefix(ctx, prefix)
+
+            response = ctx.model(
+                prompt,
+                max_tokens=self.settings.llm_max_tokens,
+                temperature=self.settings.llm_temperature,
+                grammar=grammar,
+                stop=["</s>", "Llama:", "User:"]
+            )
         
         # Llama-cpp-python returns a dict, the 'choices' list contains the result
-        import json
         try:
             text_result = response["choices"][0]["text"]
             return json.loads(text_result)
@@ -1,12 +1,16 @@
+# Constant instruction prefix shared by every dispatch prompt. Kept separate so
+# the LLM client can evaluate it once and reuse its KV state across calls.
+DISPATCH_PROMPT_PREFIX = """### Instruction:
+You are an expert emergency dispatch analyst. Analyze the following transcript and extract structured information.
+
+### Transcript:
+"""
+
 def get_dispatch_summary_prompt(transcript: str) -> str:
     """
     return a prompt for the LLM to summarize a dispatch transcript.
     """
-    return f"""### Instruction:
-You are an expert emergency dispatch analyst. Analyze the following transcript and extract structured information.
-
-### Transcript:
-{transcript}
+    return f"""{DISPATCH_PROMPT_PREFIX}{transcript}
 
 ### Response:
 """
@@ -1,13 +1,24 @@
 import structlog
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
 from app.core.config import get_settings
 from app.models.dbmodels import Base
+from app.db.upgrades import apply_extensions, apply_upgrades
+from app.db.partitions import maintain_partitions
 
 logger = structlog.get_logger("database")
 
 settings = get_settings()
 
+def _async_url(dsn: str) -> URL:
+    """Same database as `postgres_dsn`, through the asyncpg driver with statement caching."""
+    return make_url(dsn).set(drivername="postgresql+asyncpg").update_query_dict({
+        "prepared_statement_cache_size": str(settings.db_statement_cache_size)
+    })
+
+# Sync engine: schema management at startup and maintenance jobs
 engine = create_engine(
     settings.postgres_dsn,
     pool_pre_ping=True,
@@ -20,10 +31,30 @@ SessionLocal = sessionmaker(
     bind=engine
 )
 
+# Async engine: pipeline and API traffic, so DB round-trips never block the event loop
+async_engine = create_async_engine(
+    _async_url(settings.postgres_dsn),
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_pre_ping=True,
+    echo=False
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 def init_db():
     logger.info("Initializing PostgreSQL database schemas (if not exist)...")
     try:
+        with engine.begin() as conn:
+            apply_extensions(conn)
         Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            apply_upgrades(conn)
+        maintain_partitions(engine, settings)
         logger.info("Database schemas initialized.")
     except Exception as e:
         logger.error("Failed to initialize database", error=str(e))
@@ -35,3 +66,7 @@ def get_db_session():
         yield db
     finally:
         db.close()
+
+async def get_async_db_session():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,139 @@
+import asyncio
+import re
+import structlog
+from datetime import datetime, timedelta
+from typing import Any, List, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+logger = structlog.get_logger("database")
+
+PARENT = "transcripts"
+_BOUND = re.compile(r"FROM \('([^']+)'\) TO \('([^']+)'\)")
+
+def _month_index(ts: datetime) -> int:
+    return ts.year * 12 + ts.month - 1
+
+def _from_index(index: int) -> datetime:
+    return datetime(index // 12, index % 12 + 1, 1)
+
+def period_bounds(ts: datetime, months: int) -> Tuple[datetime, datetime]:
+    """[start, end) of the `months`-long partition period containing `ts`."""
+    start = _month_index(ts) // months * months
+    return _from_index(start), _from_index(start + months)
+
+def partition_name(start: datetime) -> str:
+    return f"{PARENT}_p{start:%Y%m}"
+
+def is_partitioned(conn: Connection) -> bool:
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = :name AND pg_table_is_visible(c.oid)"
+    ), {"name": PARENT}).first() is not None
+
+def list_partitions(conn: Connection) -> List[Tuple[str, datetime, datetime]]:
+    """(name, start, end) of every range partition attached to `transcripts`, oldest first."""
+    rows = conn.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+        "FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :name AND pg_table_is_visible(p.oid)"
+    ), {"name": PARENT}).all()
+
+    partitions = []
+    for name, bound in rows:
+        match = _BOUND.search(bound or "")
+        if match:
+            partitions.append((name, datetime.fromisoformat(match.group(1)), datetime.fromisoformat(match.group(2))))
+    return sorted(partitions, key=lambda p: p[1])
+
+def ensure_partitions(conn: Connection, settings: Any, now: datetime) -> List[str]:
+    """
+    Creates the partition for the current period and `partition_premake` periods
+    ahead. Periods overlapping an existing partition (e.g. after the interval
+    setting changed) are skipped.
+    """
+    existing = list_partitions(conn)
+    created = []
+    start, end = period_bounds(now, settings.partition_months)
+    for _ in range(settings.partition_premake + 1):
+        if not any(s < end and start < e for _, s, e in existing):
+            name = partition_name(start)
+            conn.execute(text(
+                f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF {PARENT} '
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            ))
+            existing.append((name, start, end))
+            created.append(name)
+        start, end = end, _from_index(_month_index(end) + settings.partition_months)
+
+    if created:
+        logger.info("Created transcript partitions", partitions=created)
+    return created
+
+def expired_partitions(conn: Connection, settings: Any, now: datetime) -> List[str]:
+    """Partitions whose whole range is older than the retention window."""
+    if settings.retention_months <= 0:
+        return []
+    cutoff = _from_index(_month_index(now) - settings.retention_months)
+    return [name for name, _, end in list_partitions(conn) if end <= cutoff]
+
+def apply_retention(engine: Engine, settings: Any, now: datetime) -> List[str]:
+    """
+    Detaches partitions past `retention_months` and drops them unless
+    `retention_action` is "detach" (the table is then left for archiving).
+    Replaces row-by-row DELETEs: only catalog locks, no table scan or vacuum debt.
+    """
+    with engine.connect() as conn:
+        expired = expired_partitions(conn, settings, now)
+
+    # DETACH ... CONCURRENTLY cannot run inside a transaction block
+    autocommit = engine.execution_options(isolation_level="AUTOCOMMIT")
+    for name in expired:
+        with autocommit.connect() as conn:
+            conn.execute(text(f'ALTER TABLE {PARENT} DETACH PARTITION "{name}" CONCURRENTLY'))
+            if settings.retention_action != "detach":
+                conn.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+        logger.info("Retired transcript partition", partition=name, action=settings.retention_action)
+    return expired
+
+def prune_activity(conn: Connection, settings: Any, now: datetime) -> None:
+    """Applies the same retention window to the hourly node_activity buckets."""
+    if settings.retention_months <= 0:
+        return
+    cutoff = _from_index(_month_index(now) - settings.retention_months)
+    conn.execute(text("DELETE FROM node_activity WHERE bucket < :cutoff"), {"cutoff": cutoff})
+
+def prune_analysis_cache(conn: Connection, settings: Any, now: datetime) -> None:
+    """Deletes persisted LLM cache entries past `llm_cache_ttl_seconds`; reads already ignore them."""
+    if settings.llm_cache_ttl_seconds <= 0:
+        return
+    cutoff = now - timedelta(seconds=settings.llm_cache_ttl_seconds)
+    result = conn.execute(text("DELETE FROM llm_analysis_cache WHERE created_at < :cutoff"), {"cutoff": cutoff})
+    if result.rowcount:
+        logger.info("Pruned expired LLM cache entries", count=result.rowcount)
+
+def maintain_partitions(engine: Engine, settings: Any) -> None:
+    """Creates upcoming partitions and applies retention. Safe to run repeatedly."""
+    now = datetime.now()
+    with engine.begin() as conn:
+        prune_activity(conn, settings, now)
+        prune_analysis_cache(conn, settings, now)
+        if not is_partitioned(conn):
+            logger.warning(
+                "transcripts table is not partitioned; partition management disabled. "
+                "Recreate the table (or migrate its rows into a partitioned copy) to enable it."
+            )
+            return
+        ensure_partitions(conn, settings, now)
+    apply_retention(engine, settings, now)
+
+async def run_partition_maintenance(engine: Engine, settings: Any, executors: Any):
+    """Background task repeating `maintain_partitions` every `partition_maintenance_hours`."""
+    while True:
+        await asyncio.sleep(settings.partition_maintenance_hours * 3600)
+        try:
+            await executors.io.run(maintain_partitions, engine, settings)
+        except Exception as e:
+            logger.error("Partition maintenance failed", error=str(e))
@@ -0,0 +1,55 @@
+import structlog
+from typing import List
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+logger = structlog.get_logger("database")
+
+# Extensions the models depend on; must exist before `create_all`.
+EXTENSIONS: List[str] = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+]
+
+# Idempotent DDL bringing databases created by older versions up to the current
+# models. `create_all` only creates missing tables, so columns and indexes added
+# to existing tables are listed here as well. Append only.
+UPGRADES: List[str] = [
+    # Full-text search
+    """ALTER TABLE transcripts ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (to_tsvector('english', coalesce(raw_text, ''))) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_transcripts_search_vector ON transcripts USING gin (search_vector)",
+    # Trigram fuzzy matching
+    """ALTER TABLE transcripts ADD COLUMN IF NOT EXISTS entity_text text
+        GENERATED ALWAYS AS (coalesce(jsonb_path_query_array(processed_json::jsonb, '$.entities[*].value')::text, '')) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_transcripts_raw_text_trgm ON transcripts USING gin (raw_text gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_transcripts_entity_text_trgm ON transcripts USING gin (entity_text gin_trgm_ops)",
+    # Keyset pagination
+    "CREATE INDEX IF NOT EXISTS ix_transcripts_org_id ON transcripts (organization_id, id DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_transcripts_org_station_id ON transcripts (organization_id, station_id, id DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_transcripts_org_node_id ON transcripts (organization_id, node_id, id DESC)",
+    # Packed segment storage (app/utils/segment_codec.py)
+    "ALTER TABLE transcripts ADD COLUMN IF NOT EXISTS segments_blob bytea",
+    "ALTER TABLE transcripts ALTER COLUMN segments_json DROP NOT NULL",
+    # Time-range scans (partitioning itself needs a new table, see app/db/partitions.py)
+    "CREATE INDEX IF NOT EXISTS ix_transcripts_received_at_brin ON transcripts USING brin (received_at)",
+    # Incremental node counters (counting starts from this upgrade)
+    "ALTER TABLE nodes ADD COLUMN IF NOT EXISTS audio_seconds double precision NOT NULL DEFAULT 0",
+    # Idempotent ingest
+    "ALTER TABLE transcripts ADD COLUMN IF NOT EXISTS audio_sha256 varchar(64)",
+    "ALTER TABLE transcripts ADD COLUMN IF NOT EXISTS chunk_id varchar",
+    "CREATE INDEX IF NOT EXISTS ix_transcripts_org_sha256 ON transcripts (organization_id, audio_sha256)",
+    "CREATE INDEX IF NOT EXISTS ix_transcripts_org_node_chunk ON transcripts (organization_id, node_id, chunk_id)",
+    # Single-column indexes superseded by the keyset pagination indexes
+    "DROP INDEX IF EXISTS ix_transcripts_organization_id",
+    "DROP INDEX IF EXISTS ix_transcripts_station_id",
+    "DROP INDEX IF EXISTS ix_transcripts_node_id",
+]
+
+def apply_extensions(conn: Connection):
+    for stmt in EXTENSIONS:
+        conn.execute(text(stmt))
+
+def apply_upgrades(conn: Connection):
+    for stmt in UPGRADES:
+        conn.execute(text(stmt))
+    logger.info("Schema upgrades applied", statements=len(UPGRADES))
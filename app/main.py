@@ -5,13 +5,21 @@ from contextlib import asynccontextmanager
 
 from app.core.config import get_settings
 from app.core.logging import setup_logging
-from app.db.database import init_db
+from app.db.database import init_db, engine, async_engine
+from app.db.partitions import run_partition_maintenance
 from app.api.router import api_router
 from app.core.llm_client import LlamaClient
 from app.services.transcription_service import TranscriptionService
 from app.services.post_processing_service import PostProcessingService
-from app.services.pipeline import pipeline_worker
+from app.services.pipeline import pipeline_worker, analysis_worker, recover_unanalyzed
+from app.services.hierarchy_cache import HierarchyCache
+from app.services.transcript_writer import TranscriptWriter
+from app.services.ingest_dedup import IngestDedup
+from app.services.ingest_service import IngestService
+from app.services.upload_service import UploadService
+from app.services.job_queue import JobQueue
 from app.utils.event_bus import event_bus
+from app.utils.executors import PipelineExecutors
 
 # Setup logging
 setup_logging()
@@ -20,7 +28,6 @@ logger = logging.getLogger("EchoHQ")
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     settings = get_settings()
-    loop = asyncio.get_event_loop()
     
     # 1. Initialize Directories & Permissions
     logger.info("Initializing system directories...")
@@ -31,24 +38,45 @@ async def lifespan(app: FastAPI):
     init_db()
     
     # 3. AI Model Readiness
+    executors = PipelineExecutors(settings)
+    app.state.executors = executors
     transcriber = TranscriptionService(settings)
     llm_client = LlamaClient(settings)
-    post_processor = PostProcessingService(settings, llm_client)
+    app.state.llm_client = llm_client
+    post_processor = PostProcessingService(settings, llm_client, executors)
+    app.state.post_processor = post_processor
 
-    # Run model verification in a thread
+    # Run model verification on the transcription executor
     logger.info("Performing AI model readiness check...")
-    await loop.run_in_executor(None, transcriber.ensure_model_ready)
+    await executors.transcription.run(transcriber.ensure_model_ready)
     
     # 4. Pipeline setup
-    queue: asyncio.Queue = asyncio.Queue()
+    queue = JobQueue(settings)
     app.state.queue = queue
+    analysis_queue: asyncio.Queue = asyncio.Queue(maxsize=settings.analysis_queue_size)
+    app.state.analysis_queue = analysis_queue
+    hierarchy = HierarchyCache()
+    writer = TranscriptWriter(settings, hierarchy)
+    app.state.writer = writer
+    dedup = IngestDedup(settings)
+    app.state.dedup = dedup
+    app.state.ingest = IngestService(settings, executors, dedup, queue)
+    app.state.uploads = UploadService(settings, executors)
     
     # Start N workers as configured
     logger.info(f"Starting {settings.transcription_workers} transcription workers...")
     workers = [
-        asyncio.create_task(pipeline_worker(queue, settings, transcriber, post_processor))
+        asyncio.create_task(pipeline_worker(queue, settings, transcriber, analysis_queue, executors, writer, dedup))
         for _ in range(settings.transcription_workers)
     ]
+    logger.info(f"Starting {settings.llm_workers} analysis workers...")
+    workers += [
+        asyncio.create_task(analysis_worker(analysis_queue, post_processor))
+        for _ in range(settings.llm_workers)
+    ]
+    writer_task = asyncio.create_task(writer.run())
+    workers.append(asyncio.create_task(recover_unanalyzed(analysis_queue, settings)))
+    workers.append(asyncio.create_task(run_partition_maintenance(engine, settings, executors)))
     
     logger.info("--- ECHO HQ SYSTEM FULLY INITIALIZED & READY ---")
     yield
@@ -60,6 +88,11 @@ async def lifespan(app: FastAPI):
     
     # Wait for cancel to propagate
     await asyncio.gather(*workers, return_exceptions=True)
+    # The writer is stopped, not cancelled, so an in-flight batch is never lost
+    writer.stop()
+    await writer_task
+    executors.shutdown()
+    await async_engine.dispose()
     logger.info("Echo HQ Shutdown complete.")
 
 def create_app() -> FastAPI:
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from sqlalchemy import String, Float, JSON, DateTime, Integer, func, ForeignKey
+from sqlalchemy import String, Float, JSON, DateTime, Integer, LargeBinary, func, ForeignKey, Computed, Index, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from datetime import datetime
 from typing import Optional, Dict
 
@@ -33,26 +34,89 @@ class Node(Base):
     label: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     last_seen_at: Mapped[Optional[datetime]] = mapped_column(DateTime, default=func.now(), onupdate=func.now(), nullable=True)
     transcript_count: Mapped[int] = mapped_column(Integer, default=0)
+    audio_seconds: Mapped[float] = mapped_column(Float, default=0.0, server_default="0")
+
+class NodeActivity(Base):
+    """Per-node hourly transcript counters, maintained by the transcript writer."""
+    __tablename__ = "node_activity"
+    
+    node_id: Mapped[str] = mapped_column(String, ForeignKey("nodes.id", ondelete="CASCADE"), primary_key=True)
+    bucket: Mapped[datetime] = mapped_column(DateTime, primary_key=True)   # received_at truncated to the hour
+    organization_id: Mapped[str] = mapped_column(String, ForeignKey("organizations.id", ondelete="CASCADE"))
+    transcript_count: Mapped[int] = mapped_column(Integer, default=0)
+    audio_seconds: Mapped[float] = mapped_column(Float, default=0.0)
+
+    __table_args__ = (
+        Index("ix_node_activity_org_bucket", "organization_id", "bucket"),
+    )
 
 class Transcript(Base):
+    """
+    Range-partitioned on `received_at` (see app/db/partitions.py), so the
+    partition key is part of the primary key.
+    """
     __tablename__ = "transcripts"
     
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
-    organization_id: Mapped[str] = mapped_column(String, ForeignKey("organizations.id", ondelete="CASCADE"), index=True)
-    station_id: Mapped[str] = mapped_column(String, ForeignKey("stations.id", ondelete="CASCADE"), index=True)
-    node_id: Mapped[str] = mapped_column(String, ForeignKey("nodes.id", ondelete="CASCADE"), index=True)
+    # Covered by the composite (organization_id, ..., id DESC) indexes below
+    organization_id: Mapped[str] = mapped_column(String, ForeignKey("organizations.id", ondelete="CASCADE"))
+    station_id: Mapped[str] = mapped_column(String, ForeignKey("stations.id", ondelete="CASCADE"))
+    node_id: Mapped[str] = mapped_column(String, ForeignKey("nodes.id", ondelete="CASCADE"))
     
-    received_at: Mapped[datetime] = mapped_column(DateTime, default=func.now(), index=True)
+    received_at: Mapped[datetime] = mapped_column(DateTime, primary_key=True, default=func.now())
     recorded_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     
     duration_seconds: Mapped[float] = mapped_column(Float)
     raw_text: Mapped[str] = mapped_column(String)
-    segments_json: Mapped[str] = mapped_column(JSON)
+    # Legacy JSON segments; new rows store the packed encoding in `segments_blob`
+    segments_json: Mapped[Optional[str]] = mapped_column(JSON, nullable=True, deferred=True)
+    segments_blob: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True, deferred=True)
     audio_path: Mapped[str] = mapped_column(String)
+    audio_sha256: Mapped[Optional[str]] = mapped_column(String(64), nullable=True)
+    chunk_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)   # client-supplied, unique per node
     
     language: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     language_probability: Mapped[Optional[float]] = mapped_column(Float, nullable=True)
     
     # Post-processing
     processed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
-    processed_json: Mapped[Optional[Dict]] = mapped_column(JSON, nullable=True)
+    processed_json: Mapped[Optional[Dict]] = mapped_column(JSON, nullable=True, deferred=True)
+
+    # Full-text search (maintained by Postgres)
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed("to_tsvector('english', coalesce(raw_text, ''))", persisted=True),
+        nullable=True,
+        deferred=True
+    )
+
+    # Entity values extracted by the LLM, flattened for trigram matching
+    entity_text: Mapped[Optional[str]] = mapped_column(
+        String,
+        Computed("coalesce(jsonb_path_query_array(processed_json::jsonb, '$.entities[*].value')::text, '')", persisted=True),
+        nullable=True,
+        deferred=True
+    )
+
+    __table_args__ = (
+        # Keyset pagination: equality filters first, then the id ordering
+        Index("ix_transcripts_org_id", "organization_id", text("id DESC")),
+        Index("ix_transcripts_org_station_id", "organization_id", "station_id", text("id DESC")),
+        Index("ix_transcripts_org_node_id", "organization_id", "node_id", text("id DESC")),
+        Index("ix_transcripts_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_transcripts_raw_text_trgm", "raw_text", postgresql_using="gin", postgresql_ops={"raw_text": "gin_trgm_ops"}),
+        Index("ix_transcripts_entity_text_trgm", "entity_text", postgresql_using="gin", postgresql_ops={"entity_text": "gin_trgm_ops"}),
+        # Rows arrive in received_at order, so a BRIN index stays tiny on every partition
+        Index("ix_transcripts_received_at_brin", "received_at", postgresql_using="brin"),
+        # Retransmit detection
+        Index("ix_transcripts_org_sha256", "organization_id", "audio_sha256"),
+        Index("ix_transcripts_org_node_chunk", "organization_id", "node_id", "chunk_id"),
+        {"postgresql_partition_by": "RANGE (received_at)"},
+    )
+
+class AnalysisCacheEntry(Base):
+    __tablename__ = "llm_analysis_cache"
+    
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    result: Mapped[Dict] = mapped_column(JSON)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now(), index=True)
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
+from typing import List, Optional
 
 class IngestResponse(BaseModel):
     status: str
@@ -8,6 +9,50 @@ class IngestResponse(BaseModel):
     station_id: str
     received_at: datetime
     queue_depth: int
+    estimated_wait_seconds: Optional[float] = None   # from recent per-job processing times; None until measured
+    duplicate: bool = False
+    transcript_id: Optional[int] = None   # set for duplicates whose original is already transcribed
+    chunk_id: Optional[str] = None
+    audio_sha256: Optional[str] = None
+
+class BatchManifestEntry(BaseModel):
+    file: str                              # multipart filename of the chunk
+    recorded_at: Optional[datetime] = None
+    chunk_id: Optional[str] = Field(None, max_length=128)
+
+class BatchItemResult(BaseModel):
+    file: str
+    chunk_id: Optional[str] = None
+    status: str                            # queued | duplicate | rejected
+    transcript_id: Optional[int] = None
+    audio_sha256: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchIngestResponse(BaseModel):
+    node_id: str
+    organization_id: str
+    station_id: str
+    received_at: datetime
+    queue_depth: int
+    estimated_wait_seconds: Optional[float] = None
+    queued: int
+    duplicates: int
+    rejected: int
+    items: List[BatchItemResult]
+
+class UploadCreate(BaseModel):
+    node_id: str
+    station_id: str
+    length: int = Field(..., gt=0)         # total bytes the client will send
+    content_type: str = "audio/wav"
+    recorded_at: Optional[datetime] = None
+    chunk_id: Optional[str] = Field(None, max_length=128)
+
+class UploadStatus(BaseModel):
+    upload_id: str
+    offset: int                            # bytes received so far; resume from here
+    length: int
+    expires_at: datetime
 
 class IngestError(BaseModel):
     detail: str
@@ -11,8 +11,19 @@ class NodeOut(BaseModel):
     transcript_count: int = 0
 
 class NodeStats(BaseModel):
+    model_config = {"from_attributes": True}
+
     id: str
     organization_id: str
     station_id: str
+    label: Optional[str] = None
+    transcript_count: int
+    audio_seconds: float = 0.0
+    last_activity: Optional[datetime] = None
+
+class ActivityBucket(BaseModel):
+    model_config = {"from_attributes": True}
+
+    bucket: datetime   # start of the hour
     transcript_count: int
-    last_activity: datetime
+    audio_seconds: float
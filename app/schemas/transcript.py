@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
 class TranscriptOut(BaseModel):
@@ -16,11 +16,22 @@ class TranscriptOut(BaseModel):
     audio_path: str
     language: Optional[str] = None
 
+class TranscriptDetail(TranscriptOut):
+    language_probability: Optional[float] = None
+    segments: List[Dict[str, Any]] = []
+    processed_at: Optional[datetime] = None
+    processed_json: Optional[Dict[str, Any]] = None
+
+class WordTiming(BaseModel):
+    word: str
+    start: float
+    end: float
+    probability: float
+
 class TranscriptPage(BaseModel):
     items: List[TranscriptOut]
-    total: int
     limit: int
-    offset: int
+    next_cursor: Optional[str] = None   # pass as `cursor` to fetch the next page; None on the last page
 
 class SearchResult(BaseModel):
     id: int
@@ -30,3 +41,5 @@ class SearchResult(BaseModel):
     received_at: datetime
     snippet: str
     audio_path: str
+    rank: float = 0.0
+    segment_start: Optional[float] = None   # start (s) of the first segment containing a match
@@ -0,0 +1,120 @@
+import hashlib
+import re
+import threading
+import time
+import structlog
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.db.database import AsyncSessionLocal
+from app.models.dbmodels import AnalysisCacheEntry
+
+logger = structlog.get_logger("analysis_cache")
+
+_NON_WORD = re.compile(r"[^\w\s-]")
+_SPACES = re.compile(r"\s+")
+
+class AnalysisCache:
+    """
+    LRU + TTL cache of LLM analysis results keyed by normalized transcript text.
+
+    The key also covers the prompt template and grammar, so editing either one
+    invalidates previous entries. Optionally mirrored to Postgres so the cache
+    survives restarts and is shared between server processes.
+    """
+    def __init__(self, settings: Any, prompt_template: str, grammar_text: str):
+        self.max_entries = settings.llm_cache_size
+        self.ttl = settings.llm_cache_ttl_seconds
+        self.persist = settings.llm_cache_persist
+        self._version = hashlib.sha256(f"{prompt_template}\0{grammar_text}".encode("utf-8")).hexdigest()[:16]
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """Lower-cases and strips punctuation so "Copy that." and "copy that" share an entry."""
+        return _SPACES.sub(" ", _NON_WORD.sub(" ", text.lower())).strip()
+
+    def make_key(self, text: str) -> str:
+        return hashlib.sha256(f"{self._version}\0{self.normalize(text)}".encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Memory lookup first, then Postgres when persistence is on."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+
+        if self.persist:
+            result = await self._load(key)
+            if result is not None:
+                self._remember(key, result)
+                with self._lock:
+                    self.db_hits += 1
+                return result
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    async def put(self, key: str, result: Dict[str, Any]):
+        """Stores a result in memory and, when enabled, in Postgres."""
+        self._remember(key, result)
+        if self.persist:
+            await self._store(key, result)
+
+    def _remember(self, key: str, result: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        cutoff = datetime.now() - timedelta(seconds=self.ttl)
+        async with AsyncSessionLocal() as session:
+            stmt = select(AnalysisCacheEntry.result).where(
+                AnalysisCacheEntry.key == key,
+                AnalysisCacheEntry.created_at >= cutoff
+            )
+            return (await session.execute(stmt)).scalar_one_or_none()
+
+    async def _store(self, key: str, result: Dict[str, Any]):
+        async with AsyncSessionLocal() as session:
+            stmt = pg_insert(AnalysisCacheEntry).values(
+                key=key,
+                result=result,
+                created_at=datetime.now()
+            ).on_conflict_do_update(
+                index_elements=['key'],
+                set_={'result': result, 'created_at': datetime.now()}
+            )
+            await session.execute(stmt)
+            await session.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.db_hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.db_hits) / lookups, 3) if lookups else 0.0,
+            }
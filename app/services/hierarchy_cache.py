@@ -0,0 +1,101 @@
+import threading
+import structlog
+from datetime import datetime
+from typing import Dict, Set, Tuple
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.dbmodels import Organization, Station, Node
+
+logger = structlog.get_logger("hierarchy_cache")
+
+class HierarchyCache:
+    """
+    Process-level record of the Organization/Station/Node rows known to exist.
+
+    Upserts only run for unseen or moved nodes. `last_seen_at` of known nodes
+    is bumped by the transcript writer's node counter UPDATE, in the same
+    transaction as the rows.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._orgs: Set[str] = set()
+        self._stations: Dict[str, str] = {}             # station_id -> organization_id
+        self._nodes: Dict[str, Tuple[str, str]] = {}    # node_id -> (organization_id, station_id)
+
+    async def ensure(self, session: AsyncSession, organization_id: str, station_id: str, node_id: str) -> bool:
+        """
+        Upserts whatever part of the hierarchy isn't known yet, inside the caller's
+        transaction. Returns True if statements were issued; the caller must then
+        call `remember` once the transaction has committed.
+        """
+        with self._lock:
+            org_known = organization_id in self._orgs
+            station_known = self._stations.get(station_id) == organization_id
+            node_known = self._nodes.get(node_id) == (organization_id, station_id)
+
+        if node_known:
+            return False
+
+        if not org_known:
+            stmt_org = pg_insert(Organization).values(
+                id=organization_id,
+                name=f"Org {organization_id}"
+            ).on_conflict_do_nothing(index_elements=['id'])
+            await session.execute(stmt_org)
+
+        if not station_known:
+            stmt_station = pg_insert(Station).values(
+                id=station_id,
+                organization_id=organization_id,
+                name=f"Station {station_id}"
+            ).on_conflict_do_nothing(index_elements=['id'])
+            await session.execute(stmt_station)
+
+        stmt_node = pg_insert(Node).values(
+            id=node_id,
+            organization_id=organization_id,
+            station_id=station_id
+        ).on_conflict_do_update(
+            index_elements=['id'],
+            set_={
+                'organization_id': pg_insert(Node).excluded.organization_id,
+                'station_id': pg_insert(Node).excluded.station_id,
+                'last_seen_at': datetime.now()
+            }
+        )
+        await session.execute(stmt_node)
+        await self._recount(session, organization_id)
+        return True
+
+    @staticmethod
+    async def _recount(session: AsyncSession, organization_id: str):
+        """
+        Refreshes Station.node_count and Organization.station_count for one
+        organization. Only runs when the hierarchy changes, so it stays off the
+        per-transcript path.
+        """
+        await session.execute(
+            update(Station)
+            .where(Station.organization_id == organization_id)
+            .values(node_count=select(func.count(Node.id)).where(Node.station_id == Station.id).correlate(Station).scalar_subquery())
+        )
+        await session.execute(
+            update(Organization)
+            .where(Organization.id == organization_id)
+            .values(station_count=select(func.count(Station.id)).where(Station.organization_id == Organization.id).correlate(Organization).scalar_subquery())
+        )
+
+    def remember(self, organization_id: str, station_id: str, node_id: str):
+        with self._lock:
+            self._orgs.add(organization_id)
+            self._stations[station_id] = organization_id
+            self._nodes[node_id] = (organization_id, station_id)
+
+    def forget(self, organization_id: str, station_id: str, node_id: str):
+        """Drops entries that turned out to be stale (e.g. rows deleted out of band)."""
+        with self._lock:
+            self._orgs.discard(organization_id)
+            self._stations.pop(station_id, None)
+            self._nodes.pop(node_id, None)
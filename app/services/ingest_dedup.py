@@ -0,0 +1,140 @@
+import time
+import structlog
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import and_, desc, or_, select
+
+from app.db.database import AsyncSessionLocal
+from app.models.dbmodels import Transcript
+
+logger = structlog.get_logger("ingest_dedup")
+
+Key = Tuple[str, ...]
+
+class DedupEntry:
+    def __init__(self, received_at: datetime, transcript_id: Optional[int] = None):
+        self.received_at = received_at
+        self.transcript_id = transcript_id   # None while the original is still queued
+
+class IngestDedup:
+    """
+    Window of recently accepted audio, keyed by content hash (per organization)
+    and by client chunk ID (per node), so node retransmits are answered with
+    the original job instead of being transcribed again.
+
+    Misses fall back to the `audio_sha256`/`chunk_id` columns of recent
+    transcripts, which covers restarts and entries evicted from memory.
+    """
+    def __init__(self, settings: Any):
+        self.window = settings.dedup_window_seconds
+        self.max_entries = settings.dedup_max_entries
+        self._entries: "OrderedDict[Key, Tuple[float, DedupEntry]]" = OrderedDict()
+        self.duplicates = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    @staticmethod
+    def _keys(organization_id: str, node_id: str, chunk_id: Optional[str], sha256: Optional[str]) -> List[Key]:
+        keys = []
+        if chunk_id:
+            keys.append(("chunk", organization_id, node_id, chunk_id))
+        if sha256:
+            keys.append(("sha256", organization_id, sha256))
+        return keys
+
+    def _find(self, keys: List[Key], exclude: Optional[DedupEntry] = None) -> Optional[DedupEntry]:
+        now = time.monotonic()
+        for key in keys:
+            item = self._entries.get(key)
+            if item is None:
+                continue
+            if item[0] <= now:
+                del self._entries[key]
+            elif item[1] is not exclude:
+                return item[1]
+        return None
+
+    def _store(self, keys: List[Key], entry: DedupEntry):
+        expires = time.monotonic() + self.window
+        for key in keys:
+            self._entries[key] = (expires, entry)
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _find_persisted(
+        self, organization_id: str, node_id: str, chunk_id: Optional[str], sha256: Optional[str]
+    ) -> Optional[DedupEntry]:
+        matches = []
+        if chunk_id:
+            matches.append(and_(Transcript.node_id == node_id, Transcript.chunk_id == chunk_id))
+        if sha256:
+            matches.append(Transcript.audio_sha256 == sha256)
+
+        stmt = select(Transcript.id, Transcript.received_at).where(
+            Transcript.organization_id == organization_id,
+            Transcript.received_at >= datetime.now() - timedelta(seconds=self.window),
+            or_(*matches)
+        ).order_by(desc(Transcript.id)).limit(1)
+        async with AsyncSessionLocal() as session:
+            row = (await session.execute(stmt)).one_or_none()
+        return DedupEntry(row.received_at, row.id) if row else None
+
+    async def admit(
+        self,
+        organization_id: str,
+        node_id: str,
+        received_at: datetime,
+        chunk_id: Optional[str] = None,
+        sha256: Optional[str] = None,
+        entry: Optional[DedupEntry] = None
+    ) -> Tuple[bool, DedupEntry]:
+        """
+        Returns (duplicate, entry). A new upload is registered as pending under
+        its keys, joined to `entry` when an earlier check (e.g. on the chunk ID)
+        already admitted it.
+        """
+        keys = self._keys(organization_id, node_id, chunk_id, sha256)
+        if not self.enabled or not keys:
+            return False, entry or DedupEntry(received_at)
+
+        hit = self._find(keys, exclude=entry)
+        if hit is None:
+            persisted = await self._find_persisted(organization_id, node_id, chunk_id, sha256)
+            # Another request may have claimed the keys while the lookup ran
+            hit = self._find(keys, exclude=entry) or persisted
+            if persisted is not None and hit is persisted:
+                self._store(keys, persisted)
+
+        if hit is not None:
+            if entry is not None:
+                # The chunk ID turned out to carry known audio; point it at the original
+                self._store(keys, hit)
+            self.duplicates += 1
+            logger.info("Duplicate audio chunk", org_id=organization_id, node_id=node_id,
+                        chunk_id=chunk_id, transcript_id=hit.transcript_id)
+            return True, hit
+
+        entry = entry or DedupEntry(received_at)
+        self._store(keys, entry)
+        return False, entry
+
+    def complete(self, organization_id: str, node_id: str, chunk_id: Optional[str], sha256: Optional[str], transcript_id: int):
+        entry = self._find(self._keys(organization_id, node_id, chunk_id, sha256))
+        if entry is not None:
+            entry.transcript_id = transcript_id
+
+    def release(self, organization_id: str, node_id: str, chunk_id: Optional[str], sha256: Optional[str]):
+        """Forgets an upload that was rejected or failed, so a retransmit is processed normally."""
+        for key in self._keys(organization_id, node_id, chunk_id, sha256):
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "window_seconds": self.window,
+            "duplicates": self.duplicates,
+        }
@@ -0,0 +1,131 @@
+import structlog
+from datetime import datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.services.ingest_dedup import DedupEntry, IngestDedup
+from app.services.job_queue import JobQueue
+from app.services.storage_service import StorageService
+from app.utils.audio_validator import AudioInfo, AudioValidator
+from app.utils.executors import PipelineExecutors
+
+logger = structlog.get_logger("ingest_service")
+
+class AdmitResult(NamedTuple):
+    original: Optional[DedupEntry]   # set when the chunk is a retransmit
+    audio_path: Optional[Path]       # stored audio, relative to audio_dir; None for retransmits
+    sha256: Optional[str]
+
+class IngestService:
+    """
+    Shared path from received bytes to stored audio: dedup, admission control,
+    size and header validation, content-addressed storage. Used by single,
+    batch and resumable ingest; blocking file work runs on the io executor.
+    """
+    def __init__(self, settings: Any, executors: PipelineExecutors, dedup: IngestDedup, queue: JobQueue):
+        self.settings = settings
+        self.executors = executors
+        self.dedup = dedup
+        self.queue = queue
+
+    def priority(self, node_id: str, station_id: str, requested: str = "live") -> str:
+        """Queue class the node's chunks land in (emergency nodes and stations are promoted)."""
+        return self.queue.priority_for(node_id, station_id, requested)
+
+    def ensure_capacity(self, organization_id: str, jobs: int = 1, priority: str = "live"):
+        """
+        Admission control, checked before any audio is written: 503 when the
+        server is saturated, 429 when the organization is over its quota, both
+        with a Retry-After the node can honor. Only work queued ahead of
+        `priority` counts.
+        """
+        rejection = self.queue.check(organization_id, jobs, priority)
+        if rejection is not None:
+            logger.warning("Ingest refused", org_id=organization_id, jobs=jobs, priority=priority,
+                           status=rejection.status_code, reason=rejection.detail)
+            raise HTTPException(
+                status_code=rejection.status_code,
+                detail=rejection.detail,
+                headers={"Retry-After": str(rejection.retry_after)}
+            )
+
+    def estimated_wait(self, job: Optional[Any] = None) -> Optional[float]:
+        """Expected queue wait, for a queued `job` when given."""
+        if job is None:
+            wait = self.queue.estimated_wait()
+        else:
+            wait = self.queue.drain_seconds(self.queue.jobs_ahead(job.organization_id, self.queue.classify(job), 0))
+        return round(wait, 1) if wait is not None else None
+
+    def spool_stream(self, src: BinaryIO, organization_id: str) -> Tuple[Path, str]:
+        """Streams `src` into the organization's storage tree, hashing it on the way. Blocking."""
+        tmp_path, size, sha256 = StorageService.spool(src, organization_id, self.settings, self.settings.max_audio_size_bytes)
+        try:
+            AudioValidator.check_size(size, self.settings)
+        except BaseException:
+            StorageService.discard(tmp_path)
+            raise
+        return tmp_path, sha256
+
+    def hash_spooled(self, path: Path) -> Tuple[Path, str]:
+        """Checks and hashes a file already on disk (e.g. a completed resumable upload). Blocking."""
+        size, sha256 = StorageService.hash_file(path)
+        try:
+            AudioValidator.check_size(size, self.settings)
+        except BaseException:
+            StorageService.discard(path)
+            raise
+        return path, sha256
+
+    def _store(self, tmp_path: Path, organization_id: str, sha256: str) -> Tuple[Path, AudioInfo]:
+        """Validates the spooled file's header, then moves it to its content address. Blocking."""
+        try:
+            info = AudioValidator.validate_file(tmp_path, self.settings)
+            return StorageService.commit(tmp_path, StorageService.content_path(organization_id, sha256), self.settings), info
+        except BaseException:
+            StorageService.discard(tmp_path)
+            raise
+
+    async def admit(
+        self,
+        organization_id: str,
+        node_id: str,
+        received_at: datetime,
+        chunk_id: Optional[str],
+        spool: Callable[[], Tuple[Path, str]],
+        pending: int = 0,
+        priority: str = "live"
+    ) -> AdmitResult:
+        """
+        Runs one chunk through dedup, admission control, `spool` (a blocking
+        callable returning the spooled path and its sha256), validation and
+        storage. `pending` counts jobs the caller has admitted but not queued
+        yet; `priority` is the class they will be queued in. Raises HTTPException when the chunk is rejected.
+        """
+        # Known chunk ID: answer without reading the audio, even under overload
+        entry = None
+        if chunk_id:
+            duplicate, entry = await self.dedup.admit(organization_id, node_id, received_at, chunk_id=chunk_id)
+            if duplicate:
+                return AdmitResult(entry, None, None)
+
+        sha256 = None
+        try:
+            self.ensure_capacity(organization_id, pending + 1, priority)
+            tmp_path, sha256 = await self.executors.io.run(spool)
+
+            duplicate, original = await self.dedup.admit(
+                organization_id, node_id, received_at, chunk_id=chunk_id, sha256=sha256, entry=entry
+            )
+            if duplicate:
+                await self.executors.io.run(StorageService.discard, tmp_path)
+                return AdmitResult(original, None, sha256)
+
+            audio_path, _info = await self.executors.io.run(self._store, tmp_path, organization_id, sha256)
+            return AdmitResult(None, audio_path, sha256)
+        except BaseException:
+            # Rejected or interrupted: a retransmit must be processed normally
+            self.dedup.release(organization_id, node_id, chunk_id, sha256)
+            raise
@@ -0,0 +1,242 @@
+import asyncio
+import itertools
+import math
+import time
+import structlog
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+logger = structlog.get_logger("job_queue")
+
+# Lower rank is served first
+PRIORITIES: Dict[str, int] = {
+    "emergency": 0,   # live traffic from ECHO_EMERGENCY_NODES / ECHO_EMERGENCY_STATIONS
+    "live": 1,
+    "backfill": 2,
+    "reprocess": 3,
+}
+
+EWMA_ALPHA = 0.2   # weight of the newest per-job processing time
+
+class Rejection(NamedTuple):
+    status_code: int    # 429 for a tenant over its quota, 503 when the server as a whole is saturated
+    retry_after: int    # seconds
+    detail: str
+
+class JobQueue:
+    """
+    Transcription job scheduler with the asyncio.Queue interface used by the
+    pipeline. Jobs are served by priority class (`job.priority`, with live
+    traffic from emergency nodes and stations promoted to `emergency`), so
+    backfill and reprocessing never delay live traffic.
+
+    Within a class, flows (organizations, or stations with
+    `queue_fair_by_station`) share the workers by weight using start-time
+    fair queueing: each job is tagged max(class virtual time, flow's last
+    finish tag) and its flow's tag advances by 1/weight. Jobs are served in
+    tag order, so one organization's backlog cannot hold back another's
+    traffic; FIFO order holds within a flow.
+
+    Also the admission point for ingest: `check` refuses new work once the
+    queue as a whole is full (bulk classes stop short of that, leaving room
+    for live traffic), the jobs that would be served ahead of it would take
+    too long to drain (jobs x EWMA of per-job processing time / workers), or
+    an organization exceeds its share of the queue.
+    """
+    def __init__(self, settings: Any):
+        self.max_depth = settings.queue_max_depth
+        # Backfill and reprocessing stop short of max_depth so live traffic keeps headroom
+        self.bulk_max_depth = math.floor(settings.queue_max_depth * (1 - settings.queue_live_reserve))
+        self.max_wait = settings.queue_max_wait_seconds
+        self.org_quota = settings.queue_org_quota
+        self.org_quotas: Dict[str, int] = settings.queue_org_quotas
+        self.org_weights: Dict[str, float] = settings.queue_org_weights
+        self.fair_by_station = settings.queue_fair_by_station
+        self.emergency_nodes = set(settings.emergency_nodes)
+        self.emergency_stations = set(settings.emergency_stations)
+        self.workers = max(1, settings.transcription_workers)
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._seq = itertools.count()
+        self._depth: Dict[str, int] = {name: 0 for name in PRIORITIES}
+        self._org_depth: Dict[str, Dict[str, int]] = {}   # organization -> class -> queued jobs
+        # Fair queueing state per class: virtual time, and finish tags / queued counts per flow
+        self._vtime: Dict[str, float] = {name: 0.0 for name in PRIORITIES}
+        self._finish: Dict[str, Dict[Tuple[str, ...], float]] = {name: {} for name in PRIORITIES}
+        self._flow_depth: Dict[str, Dict[Tuple[str, ...], int]] = {name: {} for name in PRIORITIES}
+        # Queue wait per class
+        self._served: Dict[str, int] = {name: 0 for name in PRIORITIES}
+        self._wait_total: Dict[str, float] = {name: 0.0 for name in PRIORITIES}
+        self._wait_max: Dict[str, float] = {name: 0.0 for name in PRIORITIES}
+        self._job_seconds: Optional[float] = None
+        self.rejected = {"depth": 0, "wait": 0, "quota": 0}
+
+    def priority_for(self, node_id: str, station_id: str, priority: str = "live") -> str:
+        """Class a job from this node would be queued in; unknown classes are treated as live."""
+        if priority not in PRIORITIES:
+            priority = "live"
+        if priority == "live" and (node_id in self.emergency_nodes or station_id in self.emergency_stations):
+            priority = "emergency"
+        return priority
+
+    def classify(self, job: Any) -> str:
+        return self.priority_for(job.node_id, job.station_id, getattr(job, "priority", "live"))
+
+    def _flow(self, job: Any) -> Tuple[str, ...]:
+        if self.fair_by_station:
+            return (job.organization_id, job.station_id)
+        return (job.organization_id,)
+
+    def _weight(self, job: Any) -> float:
+        return max(self.org_weights.get(job.organization_id, 1.0), 1e-3)
+
+    def put_nowait(self, job: Any):
+        priority = self.classify(job)
+        flow = self._flow(job)
+        finish = self._finish[priority]
+        start = max(self._vtime[priority], finish.get(flow, 0.0))
+        finish[flow] = start + 1.0 / self._weight(job)
+
+        self._queue.put_nowait((PRIORITIES[priority], start, next(self._seq), priority, flow, time.monotonic(), job))
+        self._depth[priority] += 1
+        flows = self._flow_depth[priority]
+        flows[flow] = flows.get(flow, 0) + 1
+        by_class = self._org_depth.setdefault(job.organization_id, {})
+        by_class[priority] = by_class.get(priority, 0) + 1
+
+    async def put(self, job: Any):
+        self.put_nowait(job)
+
+    def _taken(self, item: Any) -> Any:
+        _rank, start, _seq, priority, flow, enqueued, job = item
+        self._vtime[priority] = max(self._vtime[priority], start)
+        self._depth[priority] -= 1
+
+        flows = self._flow_depth[priority]
+        flows[flow] -= 1
+        if flows[flow] == 0:
+            del flows[flow]
+            # An idle flow whose tag the virtual time has passed restarts from it anyway
+            if self._finish[priority].get(flow, 0.0) <= self._vtime[priority]:
+                self._finish[priority].pop(flow, None)
+
+        by_class = self._org_depth[job.organization_id]
+        by_class[priority] -= 1
+        if by_class[priority] == 0:
+            del by_class[priority]
+            if not by_class:
+                del self._org_depth[job.organization_id]
+
+        waited = time.monotonic() - enqueued
+        self._served[priority] += 1
+        self._wait_total[priority] += waited
+        self._wait_max[priority] = max(self._wait_max[priority], waited)
+        return job
+
+    async def get(self) -> Any:
+        return self._taken(await self._queue.get())
+
+    def get_nowait(self) -> Any:
+        return self._taken(self._queue.get_nowait())
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def task_done(self):
+        self._queue.task_done()
+
+    async def join(self):
+        await self._queue.join()
+
+    def observe(self, seconds_per_job: float):
+        """Feeds the processing-time EWMA behind wait estimates; called by pipeline workers."""
+        if self._job_seconds is None:
+            self._job_seconds = seconds_per_job
+        else:
+            self._job_seconds += EWMA_ALPHA * (seconds_per_job - self._job_seconds)
+
+    def drain_seconds(self, jobs: int) -> Optional[float]:
+        """Time for the workers to get through `jobs` queued jobs; None until a job has been timed."""
+        if self._job_seconds is None:
+            return None
+        return jobs * self._job_seconds / self.workers
+
+    @staticmethod
+    def _ahead(depth: Dict[str, int], priority: str) -> int:
+        """Jobs in `depth` served at or ahead of `priority`."""
+        rank = PRIORITIES.get(priority, PRIORITIES["live"])
+        return sum(n for name, n in depth.items() if PRIORITIES[name] <= rank)
+
+    def jobs_ahead(self, organization_id: str, priority: str, jobs: int = 1) -> int:
+        """
+        Jobs served before the last of `jobs` new jobs from `organization_id`:
+        everything in higher classes, the organization's own queued jobs in
+        the class, and each other organization's fair share alongside them
+        (capped at what it actually has queued).
+        """
+        rank = PRIORITIES.get(priority, PRIORITIES["live"])
+        ahead = sum(n for name, n in self._depth.items() if PRIORITIES[name] < rank)
+        own = self._org_depth.get(organization_id, {}).get(priority, 0) + jobs
+        weight = max(self.org_weights.get(organization_id, 1.0), 1e-3)
+        for org, by_class in self._org_depth.items():
+            if org != organization_id and by_class.get(priority):
+                share = math.ceil(own * self.org_weights.get(org, 1.0) / weight)
+                ahead += min(by_class[priority], share)
+        return ahead + own
+
+    def estimated_wait(self, priority: Optional[str] = None) -> Optional[float]:
+        """Expected queue wait, counting only jobs served before `priority` when given."""
+        if priority is None:
+            return self.drain_seconds(self.qsize())
+        return self.drain_seconds(self._ahead(self._depth, priority))
+
+    def _retry_after(self, excess_jobs: int) -> int:
+        return max(1, math.ceil(self.drain_seconds(excess_jobs) or 1))
+
+    def check(self, organization_id: str, jobs: int = 1, priority: str = "live") -> Optional[Rejection]:
+        """
+        Whether `jobs` more jobs of class `priority` from `organization_id` may
+        be accepted; a Rejection if not. The depth limit bounds the whole queue
+        (memory, and audio already on disk); backfill and reprocessing are
+        refused `queue_live_reserve` earlier so their backlog cannot get live
+        traffic refused. The wait limit and quota count only work served ahead
+        of the new jobs, so another organization's backlog doesn't either.
+        """
+        depth = self.qsize()
+        limit = self.max_depth if PRIORITIES.get(priority, 0) <= PRIORITIES["live"] else self.bulk_max_depth
+        if self.max_depth and depth + jobs > limit:
+            self.rejected["depth"] += 1
+            return Rejection(503, self._retry_after(depth + jobs - limit),
+                             f"Transcription queue full ({depth} jobs queued)")
+
+        wait = self.drain_seconds(self.jobs_ahead(organization_id, priority, jobs))
+        if self.max_wait and wait is not None and wait > self.max_wait:
+            self.rejected["wait"] += 1
+            return Rejection(503, max(1, math.ceil(wait - self.max_wait)),
+                             f"Estimated queue wait {wait:.0f}s exceeds {self.max_wait:.0f}s")
+
+        quota = self.org_quotas.get(organization_id, self.org_quota)
+        queued = self._ahead(self._org_depth.get(organization_id, {}), priority)
+        if quota and queued + jobs > quota:
+            self.rejected["quota"] += 1
+            return Rejection(429, self._retry_after(queued + jobs - quota),
+                             f"Organization queue quota reached ({queued} of {quota} jobs queued)")
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        wait = self.estimated_wait()
+        return {
+            "depth": self.qsize(),
+            "by_priority": dict(self._depth),
+            "wait_by_priority": {
+                name: {
+                    "queued": self._depth[name],
+                    "served": self._served[name],
+                    "avg_wait_ms": round(self._wait_total[name] / (self._served[name] or 1) * 1000, 2),
+                    "max_wait_ms": round(self._wait_max[name] * 1000, 2),
+                }
+                for name in PRIORITIES
+            },
+            "by_organization": {org: sum(by_class.values()) for org, by_class in self._org_depth.items()},
+            "avg_job_seconds": round(self._job_seconds, 3) if self._job_seconds is not None else None,
+            "estimated_wait_seconds": round(wait, 1) if wait is not None else None,
+            "rejected": dict(self.rejected),
+        }
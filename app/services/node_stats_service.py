@@ -0,0 +1,107 @@
+import structlog
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import DateTime, Float, Integer, String, column, func, select, update, values, desc
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.dbmodels import Node, NodeActivity
+from app.schemas.node import ActivityBucket, NodeStats
+
+logger = structlog.get_logger("node_stats_service")
+
+STATS_COLUMNS = (
+    Node.id,
+    Node.organization_id,
+    Node.station_id,
+    Node.label,
+    Node.transcript_count,
+    Node.audio_seconds,
+    Node.last_seen_at.label("last_activity"),
+)
+
+class NodeStatsService:
+    """
+    Counters kept up to date as transcripts are written, so activity views read
+    `nodes` and `node_activity` only and never scan `transcripts`.
+    """
+    @staticmethod
+    async def record(session: AsyncSession, rows: List[Dict[str, Any]]):
+        """
+        Adds a batch of transcript rows to the node totals, `last_seen_at` and
+        hourly buckets, inside the caller's transaction so counters commit with
+        the rows. This is the only per-transcript write to `nodes`.
+        """
+        totals: Dict[str, List[Any]] = defaultdict(lambda: [0, 0.0, datetime.min])
+        buckets: Dict[Tuple[str, datetime], List[Any]] = {}
+        for r in rows:
+            seconds = r.get("duration_seconds") or 0.0
+            totals[r["node_id"]][0] += 1
+            totals[r["node_id"]][1] += seconds
+            totals[r["node_id"]][2] = max(totals[r["node_id"]][2], r["received_at"])
+
+            hour = r["received_at"].replace(minute=0, second=0, microsecond=0)
+            bucket = buckets.setdefault((r["node_id"], hour), [r["organization_id"], 0, 0.0])
+            bucket[1] += 1
+            bucket[2] += seconds
+
+        delta = values(
+            column("id", String), column("n", Integer), column("secs", Float), column("seen", DateTime), name="delta"
+        ).data(sorted((node_id, n, secs, seen) for node_id, (n, secs, seen) in totals.items()))
+        await session.execute(
+            update(Node)
+            .where(Node.id == delta.c.id)
+            .values(
+                transcript_count=Node.transcript_count + delta.c.n,
+                audio_seconds=Node.audio_seconds + delta.c.secs,
+                last_seen_at=func.greatest(Node.last_seen_at, delta.c.seen)
+            )
+        )
+
+        stmt = pg_insert(NodeActivity).values([
+            {
+                "node_id": node_id,
+                "bucket": hour,
+                "organization_id": org_id,
+                "transcript_count": n,
+                "audio_seconds": secs
+            }
+            for (node_id, hour), (org_id, n, secs) in sorted(buckets.items())
+        ])
+        await session.execute(stmt.on_conflict_do_update(
+            index_elements=["node_id", "bucket"],
+            set_={
+                "transcript_count": NodeActivity.transcript_count + stmt.excluded.transcript_count,
+                "audio_seconds": NodeActivity.audio_seconds + stmt.excluded.audio_seconds
+            }
+        ))
+
+    @staticmethod
+    async def get_all(session: AsyncSession, org_id: str, station_id: Optional[str] = None) -> List[NodeStats]:
+        stmt = select(*STATS_COLUMNS).where(Node.organization_id == org_id)
+        if station_id:
+            stmt = stmt.where(Node.station_id == station_id)
+        stmt = stmt.order_by(desc(Node.last_seen_at))
+        return [NodeStats.model_validate(r) for r in (await session.execute(stmt)).all()]
+
+    @staticmethod
+    async def get_one(session: AsyncSession, org_id: str, node_id: str) -> Optional[NodeStats]:
+        stmt = select(*STATS_COLUMNS).where(Node.id == node_id, Node.organization_id == org_id)
+        row = (await session.execute(stmt)).one_or_none()
+        return NodeStats.model_validate(row) if row else None
+
+    @staticmethod
+    async def get_activity(session: AsyncSession, org_id: str, node_id: str, hours: int = 24) -> List[ActivityBucket]:
+        """Hourly buckets for the last `hours` hours, oldest first; hours without traffic are omitted."""
+        since = datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours - 1)
+        stmt = select(
+            NodeActivity.bucket,
+            NodeActivity.transcript_count,
+            NodeActivity.audio_seconds
+        ).where(
+            NodeActivity.node_id == node_id,
+            NodeActivity.organization_id == org_id,
+            NodeActivity.bucket >= since
+        ).order_by(NodeActivity.bucket)
+        return [ActivityBucket.model_validate(r) for r in (await session.execute(stmt)).all()]
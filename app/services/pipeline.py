@@ -1,18 +1,21 @@
 import asyncio
-import json
 import structlog
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import NamedTuple, Optional
-from sqlalchemy.dialects.postgresql import insert as pg_insert
-from sqlalchemy import func
+from typing import Any, Dict, List, NamedTuple, Optional
+from sqlalchemy import func, select, tuple_, update
 
 from app.core.config import Settings
-from app.db.database import SessionLocal
-from app.models.dbmodels import Organization, Station, Node, Transcript
-from app.services.transcription_service import TranscriptionService
+from app.db.database import AsyncSessionLocal
+from app.models.dbmodels import Transcript
+from app.services.transcription_service import TranscriptionService, TranscriptResult
+from app.services.transcript_writer import TranscriptWriter
+from app.services.ingest_dedup import IngestDedup
+from app.services.job_queue import JobQueue
 from app.services.post_processing_service import PostProcessingService
 from app.utils.event_bus import event_bus
+from app.utils.executors import PipelineExecutors
+from app.utils.segment_codec import encode_segments
 
 logger = structlog.get_logger("pipeline")
 
@@ -23,108 +26,250 @@ class TranscriptionJob(NamedTuple):
     received_at: datetime
     recorded_at: Optional[datetime]
     audio_path: Path
+    audio_sha256: Optional[str] = None
+    chunk_id: Optional[str] = None
+    priority: str = "live"   # job_queue.PRIORITIES class
+
+class AnalysisJob(NamedTuple):
+    transcript_id: int
+    received_at: datetime    # partition key, lets the analysis UPDATE prune to one partition
+    node_id: str
+    organization_id: str
+    station_id: str
+    text: str
+
+async def _collect_batch(queue: JobQueue, first: TranscriptionJob, settings: Settings) -> List[TranscriptionJob]:
+    """
+    Groups further queued jobs with `first` until the batch is full or the wait expires.
+    """
+    loop = asyncio.get_event_loop()
+    batch = [first]
+    deadline = loop.time() + settings.transcription_batch_wait_ms / 1000
+
+    while len(batch) < settings.transcription_batch_size:
+        timeout = deadline - loop.time()
+        if timeout <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(queue.get(), timeout=timeout))
+        except asyncio.TimeoutError:
+            break
+    return batch
+
+async def _save_analysis(transcript_id: int, received_at: datetime, analysis: Dict[str, Any]):
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(Transcript)
+            .where(Transcript.id == transcript_id, Transcript.received_at == received_at)
+            .values(processed_json=analysis, processed_at=func.now())
+        )
+        await session.commit()
+
+async def _persist_and_publish(
+    job: TranscriptionJob,
+    result: TranscriptResult,
+    analysis_queue: asyncio.Queue,
+    writer: TranscriptWriter,
+    dedup: IngestDedup
+):
+    transcript_id = await writer.write({
+        "node_id": job.node_id,
+        "organization_id": job.organization_id,
+        "station_id": job.station_id,
+        "received_at": job.received_at,
+        "recorded_at": job.recorded_at,
+        "duration_seconds": result.duration,
+        "raw_text": result.text,
+        "segments_blob": encode_segments(result.segments),
+        "audio_path": str(job.audio_path),
+        "audio_sha256": job.audio_sha256,
+        "chunk_id": job.chunk_id,
+        "language": result.language,
+        "language_probability": result.language_probability
+    })
+    dedup.complete(job.organization_id, job.node_id, job.chunk_id, job.audio_sha256, transcript_id)
+
+    # Broadcast
+    await event_bus.publish({
+        "type": "transcript",
+        "id": transcript_id,
+        "node_id": job.node_id,
+        "organization_id": job.organization_id,
+        "station_id": job.station_id,
+        "received_at": job.received_at.isoformat(),
+        "text": result.text,
+        "audio_path": str(job.audio_path)
+    })
+
+    # Hand off to the LLM stage
+    await analysis_queue.put(AnalysisJob(
+        transcript_id=transcript_id,
+        received_at=job.received_at,
+        node_id=job.node_id,
+        organization_id=job.organization_id,
+        station_id=job.station_id,
+        text=result.text
+    ))
+
+    logger.info("Completed transcription job", 
+                node_id=job.node_id, 
+                transcript_id=transcript_id)
+
+async def _complete_job(
+    job: TranscriptionJob,
+    result: TranscriptResult | Exception,
+    analysis_queue: asyncio.Queue,
+    writer: TranscriptWriter,
+    dedup: IngestDedup
+):
+    try:
+        if isinstance(result, Exception):
+            raise result
+        await _persist_and_publish(job, result, analysis_queue, writer, dedup)
+    except Exception as e:
+        dedup.release(job.organization_id, job.node_id, job.chunk_id, job.audio_sha256)
+        logger.error("Error in transcription pipeline", 
+                    node_id=job.node_id, 
+                    error=str(e), 
+                    exc_info=True)
 
 async def pipeline_worker(
-    queue: asyncio.Queue,
+    queue: JobQueue,
     settings: Settings,
     transcription_service: TranscriptionService,
-    post_processor: PostProcessingService
+    analysis_queue: asyncio.Queue,
+    executors: PipelineExecutors,
+    writer: TranscriptWriter,
+    dedup: IngestDedup
 ):
-    loop = asyncio.get_event_loop()
     logger.info("Pipeline worker started")
 
     while True:
         job: TranscriptionJob = await queue.get()
-        logger.info("Processing transcription job", 
-                    node_id=job.node_id, 
-                    org_id=job.organization_id, 
-                    station_id=job.station_id)
+        batch = [job]
 
         try:
+            if settings.transcription_batch_size > 1:
+                batch = await _collect_batch(queue, job, settings)
+
+            for j in batch:
+                logger.info("Processing transcription job", 
+                            node_id=j.node_id, 
+                            org_id=j.organization_id, 
+                            station_id=j.station_id)
+
             # CPU-bound transcription
-            result = await loop.run_in_executor(
-                None, 
-                transcription_service.transcribe, 
-                str(settings.audio_dir / job.audio_path)
-            )
-
-            with SessionLocal() as session:
-                # Ensure Hierarchy exists
-                stmt_org = pg_insert(Organization).values(
-                    id=job.organization_id,
-                    name=f"Org {job.organization_id}"
-                ).on_conflict_do_nothing(index_elements=['id'])
-                session.execute(stmt_org)
-
-                stmt_station = pg_insert(Station).values(
-                    id=job.station_id,
-                    organization_id=job.organization_id,
-                    name=f"Station {job.station_id}"
-                ).on_conflict_do_nothing(index_elements=['id'])
-                session.execute(stmt_station)
-
-                stmt_node = pg_insert(Node).values(
-                    id=job.node_id,
-                    organization_id=job.organization_id,
-                    station_id=job.station_id
-                ).on_conflict_do_update(
-                    index_elements=['id'],
-                    set_={
-                        'organization_id': pg_insert(Node).excluded.organization_id,
-                        'station_id': pg_insert(Node).excluded.station_id,
-                        'last_seen_at': func.now()
-                    }
+            started = asyncio.get_running_loop().time()
+            paths = [str(settings.audio_dir / j.audio_path) for j in batch]
+            if len(batch) == 1:
+                results = [await executors.transcription.run(
+                    transcription_service.transcribe, 
+                    paths[0]
+                )]
+            else:
+                results = await executors.transcription.run(
+                    transcription_service.transcribe_batch,
+                    paths
                 )
-                session.execute(stmt_node)
-
-                # Persist transcript
-                transcript = Transcript(
-                    node_id=job.node_id,
-                    organization_id=job.organization_id,
-                    station_id=job.station_id,
-                    received_at=job.received_at,
-                    recorded_at=job.recorded_at,
-                    duration_seconds=result.duration,
-                    raw_text=result.text,
-                    segments_json=json.dumps(result.segments),
-                    audio_path=str(job.audio_path),
-                    language=result.language,
-                    language_probability=result.language_probability
-                )
-                session.add(transcript)
-                session.flush() # Get ID before commit if needed
-                transcript_id = transcript.id
-
-                # Post-processing (LLM analysis)
-                logger.info("Starting LLM post-processing", transcript_id=transcript_id)
-                post_processed_result = await post_processor.process_transcript(result.text)
-                
-                transcript.processed_json = post_processed_result
-                transcript.processed_at = func.now()
-                
-                session.commit()
-                transcript_id = transcript.id
-
-            # Broadcast
+            queue.observe((asyncio.get_running_loop().time() - started) / len(batch))
+
+            # Hand the whole batch to the writer at once so its rows share one INSERT
+            await asyncio.gather(*(
+                _complete_job(j, result, analysis_queue, writer, dedup)
+                for j, result in zip(batch, results)
+            ))
+
+        except Exception as e:
+            for j in batch:
+                dedup.release(j.organization_id, j.node_id, j.chunk_id, j.audio_sha256)
+                logger.error("Error in transcription pipeline", 
+                            node_id=j.node_id, 
+                            error=str(e), 
+                            exc_info=True)
+        finally:
+            for _ in batch:
+                queue.task_done()
+
+async def analysis_worker(
+    analysis_queue: asyncio.Queue,
+    post_processor: PostProcessingService
+):
+    """
+    Second pipeline stage: runs LLM post-processing on committed transcripts
+    and publishes the result as an "analysis" event.
+    """
+    logger.info("Analysis worker started")
+
+    while True:
+        job: AnalysisJob = await analysis_queue.get()
+
+        try:
+            logger.info("Starting LLM post-processing", transcript_id=job.transcript_id)
+            analysis = await post_processor.process_transcript(job.text, job.organization_id)
+
+            await _save_analysis(job.transcript_id, job.received_at, analysis)
+
             await event_bus.publish({
-                "type": "transcript",
-                "id": transcript_id,
+                "type": "analysis",
+                "id": job.transcript_id,
                 "node_id": job.node_id,
                 "organization_id": job.organization_id,
                 "station_id": job.station_id,
-                "received_at": job.received_at.isoformat(),
-                "text": result.text,
-                "audio_path": str(job.audio_path)
+                "analysis": analysis
             })
 
-            logger.info("Completed transcription job", 
-                        node_id=job.node_id, 
-                        transcript_id=transcript_id)
+            logger.info("Completed analysis job", transcript_id=job.transcript_id)
 
         except Exception as e:
-            logger.error("Error in transcription pipeline", 
-                        node_id=job.node_id, 
+            logger.error("Error in analysis pipeline", 
+                        transcript_id=job.transcript_id, 
                         error=str(e), 
                         exc_info=True)
         finally:
-            queue.task_done()
+            analysis_queue.task_done()
+
+RECOVERY_BATCH_ROWS = 500
+
+async def recover_unanalyzed(analysis_queue: asyncio.Queue, settings: Settings):
+    """
+    Startup pass re-queueing recent transcripts that were committed but never
+    analyzed, e.g. because they were still in the analysis queue at shutdown
+    or crash. Pages by (received_at, id) so the bounded queue can apply
+    backpressure without holding a cursor open.
+    """
+    if settings.analysis_recovery_hours <= 0:
+        return
+    started = datetime.now()
+    after = (started - timedelta(hours=settings.analysis_recovery_hours), 0)
+    recovered = 0
+
+    while True:
+        async with AsyncSessionLocal() as session:
+            rows = (await session.execute(
+                select(Transcript.id, Transcript.received_at, Transcript.node_id,
+                       Transcript.organization_id, Transcript.station_id, Transcript.raw_text)
+                .where(
+                    Transcript.processed_at.is_(None),
+                    Transcript.received_at < started,
+                    tuple_(Transcript.received_at, Transcript.id) > tuple_(*after)
+                )
+                .order_by(Transcript.received_at, Transcript.id)
+                .limit(RECOVERY_BATCH_ROWS)
+            )).all()
+
+        for row in rows:
+            await analysis_queue.put(AnalysisJob(
+                transcript_id=row.id,
+                received_at=row.received_at,
+                node_id=row.node_id,
+                organization_id=row.organization_id,
+                station_id=row.station_id,
+                text=row.raw_text
+            ))
+        recovered += len(rows)
+        if len(rows) < RECOVERY_BATCH_ROWS:
+            break
+        after = (rows[-1].received_at, rows[-1].id)
+
+    if recovered:
+        logger.info("Re-queued unanalyzed transcripts", count=recovered)
@@ -2,46 +2,65 @@ import structlog
 from pathlib import Path
 from typing import Any, Dict
 from app.core.llm_client import LlamaClient
-from app.core.prompts import get_dispatch_summary_prompt
+from app.core.prompts import DISPATCH_PROMPT_PREFIX, get_dispatch_summary_prompt
+from app.services.analysis_cache import AnalysisCache
+from app.services.triage_service import TriageService
+from app.utils.executors import PipelineExecutors
 
 logger = structlog.get_logger("post_processing")
 
 class PostProcessingService:
-    def __init__(self, settings: Any, llm_client: LlamaClient):
+    def __init__(self, settings: Any, llm_client: LlamaClient, executors: PipelineExecutors):
         self.settings = settings
         self.llm_client = llm_client
+        self.executors = executors
         self.grammar_path = Path(__file__).parent.parent / "core" / "grammar.gbnf"
+        # Read once; the LLM client keeps the parsed grammar in memory
+        self.grammar_text = self.grammar_path.read_text() if self.grammar_path.exists() else None
+        self.cache = AnalysisCache(settings, get_dispatch_summary_prompt(""), self.grammar_text or "")
+        self.triage = TriageService(settings)
 
-    async def process_transcript(self, transcript_text: str) -> Dict[str, Any]:
+    async def process_transcript(self, transcript_text: str, organization_id: str) -> Dict[str, Any]:
         """
         Analyzes a transcript and returns structured data.
         """
-        import asyncio
-        loop = asyncio.get_event_loop()
-
         if not transcript_text or len(transcript_text.strip()) < 5:
             logger.info("Transcript too short for processing", length=len(transcript_text))
             return {"status": "skipped", "reason": "text_too_short"}
 
+        if self.triage.enabled_for(organization_id):
+            decision = self.triage.classify(transcript_text)
+            if not decision.needs_llm:
+                logger.info("Routine transmission, skipping LLM", org_id=organization_id)
+                return self.triage.routine_analysis(transcript_text)
+
         logger.info("Processing transcript for structured data")
         
         try:
             prompt = get_dispatch_summary_prompt(transcript_text)
             
-            # Read grammar
-            if not self.grammar_path.exists():
+            if self.grammar_text is None:
                 logger.error("Grammar file not found", path=str(self.grammar_path))
                 return {"error": "Grammar file missing"}
-                
-            grammar_text = self.grammar_path.read_text()
             
-            # LLM generation is CPU-bound, run in executor
-            result = await loop.run_in_executor(
-                None, 
+            cache_key = None
+            if self.cache.enabled:
+                cache_key = self.cache.make_key(transcript_text)
+                cached = await self.cache.get(cache_key)
+                if cached is not None:
+                    logger.info("Analysis served from cache")
+                    return cached
+
+            # LLM generation is CPU-bound, run on the dedicated LLM executor
+            result = await self.executors.llm.run(
                 self.llm_client.generate_structured, 
                 prompt, 
-                grammar_text
+                self.grammar_text,
+                DISPATCH_PROMPT_PREFIX
             )
+
+            if cache_key and "error" not in result:
+                await self.cache.put(cache_key, result)
             
             logger.info("Transcript processed successfully")
             return result
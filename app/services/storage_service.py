@@ -1,26 +1,74 @@
+import hashlib
+import os
 import uuid
 from pathlib import Path
-from datetime import datetime
+from typing import BinaryIO, Tuple
 from app.core.config import Settings
 
+CHUNK_BYTES = 1024 * 1024
+
 class StorageService:
     @staticmethod
-    def save(file_bytes: bytes, node_id: str, organization_id: str, station_id: str, received_at: datetime, settings: Settings) -> Path:
+    def content_path(organization_id: str, sha256: str) -> Path:
+        """
+        Content-addressed location relative to audio_dir:
+        {organization_id}/sha256/{h[:2]}/{h}.wav, so identical bytes are stored once.
+        """
+        return Path(organization_id) / "sha256" / sha256[:2] / f"{sha256}.wav"
+
+    @staticmethod
+    def spool(src: BinaryIO, organization_id: str, settings: Settings, max_bytes: int) -> Tuple[Path, int, str]:
+        """
+        Copies `src` in chunks to a temp file inside the organization's storage
+        tree, hashing it on the way. Returns (temp path, size, sha256 hex).
+        Stops reading once `max_bytes` is exceeded, so the reported size is
+        then only a lower bound. Blocking.
+        """
+        spool_dir = settings.audio_dir / organization_id / "sha256" / ".incoming"
+        spool_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = spool_dir / f"{uuid.uuid4().hex}.part"
+
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(tmp_path, "wb") as f:
+                while size <= max_bytes:
+                    chunk = src.read(CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return tmp_path, size, digest.hexdigest()
+
+    @staticmethod
+    def hash_file(path: Path) -> Tuple[int, str]:
+        """(size, sha256 hex) of a file already on disk. Blocking."""
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, "rb") as f:
+            while chunk := f.read(CHUNK_BYTES):
+                digest.update(chunk)
+                size += len(chunk)
+        return size, digest.hexdigest()
+
+    @staticmethod
+    def commit(tmp_path: Path, relative_path: Path, settings: Settings) -> Path:
         """
-        Saves audio to: data/audio/{organization_id}/{station_id}/{node_id}/{YYYY-MM-DD}/{ts}.wav
+        Atomically moves a spooled file into place; readers never see a partial
+        file. If the content is already stored the spooled copy is dropped.
         """
-        date_str = received_at.strftime("%Y-%m-%d")
-        ts_str = received_at.strftime("%Y%m%dT%H%M%S")
-        uid = uuid.uuid4().hex[:6]
-        
-        dest_dir = settings.audio_dir / organization_id / station_id / node_id / date_str
-        dest_dir.mkdir(parents=True, exist_ok=True)
-        
-        filename = f"{ts_str}_{uid}.wav"
-        dest_path = dest_dir / filename
-        
-        with open(dest_path, "wb") as f:
-            f.write(file_bytes)
-            
-        # Return relative path from settings.audio_dir for DB storage
-        return dest_path.relative_to(settings.audio_dir)
+        dest_path = settings.audio_dir / relative_path
+        if dest_path.exists():
+            tmp_path.unlink(missing_ok=True)
+        else:
+            dest_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_path, dest_path)
+        return relative_path
+
+    @staticmethod
+    def discard(tmp_path: Path):
+        tmp_path.unlink(missing_ok=True)
@@ -0,0 +1,130 @@
+import asyncio
+import structlog
+from typing import Any, Dict, List, Tuple
+from sqlalchemy import insert
+from sqlalchemy.exc import DBAPIError, IntegrityError
+
+from app.db.database import AsyncSessionLocal
+from app.models.dbmodels import Transcript
+from app.services.hierarchy_cache import HierarchyCache
+from app.services.node_stats_service import NodeStatsService
+
+logger = structlog.get_logger("transcript_writer")
+
+PERSIST_ATTEMPTS = 5          # per batch, for transient errors (deadlocks, serialization failures, dropped connections)
+PERSIST_BACKOFF_SECONDS = 0.2 # doubled after every failed attempt
+
+class TranscriptWriter:
+    """
+    Write-behind persistence stage. Pipeline workers hand over transcript rows
+    and await their IDs; rows are buffered and inserted with one multi-row
+    INSERT ... RETURNING per batch, flushed on size or time thresholds.
+    """
+    def __init__(self, settings: Any, hierarchy: HierarchyCache):
+        self.batch_size = max(1, settings.persist_batch_size)
+        self.flush_interval = settings.persist_flush_ms / 1000
+        self.hierarchy = hierarchy
+        self._buffer: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self.batches = 0
+        self.rows = 0
+
+    async def write(self, row: Dict[str, Any]) -> int:
+        """Queues a transcript row and returns its ID once the batch has committed."""
+        future = asyncio.get_running_loop().create_future()
+        self._buffer.append((row, future))
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        return await future
+
+    async def run(self):
+        """
+        Background task flushing the buffer every `persist_flush_ms` or when a
+        batch fills. Returns after a final flush once `stop` is called; it is
+        never cancelled, so a batch taken from the buffer is always written.
+        """
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+        # Rows buffered while the last flush was running
+        await self.flush()
+
+    def stop(self):
+        """Asks `run` to flush what is buffered and return."""
+        self._stopping = True
+        self._wakeup.set()
+
+    async def flush(self):
+        while self._buffer:
+            batch, self._buffer = self._buffer[:self.batch_size], self._buffer[self.batch_size:]
+            rows = [row for row, _ in batch]
+            try:
+                ids = await self._insert_batch(rows)
+            except Exception as e:
+                logger.error("Failed to persist transcript batch", rows=len(rows), error=str(e))
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.rows += len(rows)
+            # Futures of workers cancelled at shutdown are skipped; their rows are still written
+            for (_, future), transcript_id in zip(batch, ids):
+                if not future.done():
+                    future.set_result(transcript_id)
+
+    async def _insert_batch(self, rows: List[Dict[str, Any]]) -> List[int]:
+        """
+        Upserts unseen hierarchy rows, inserts the batch and bumps the node
+        counters in one transaction. Transient database errors are retried
+        with backoff, so one deadlock or reconnect doesn't lose the batch.
+        """
+        tuples = {(r["organization_id"], r["station_id"], r["node_id"]) for r in rows}
+        stale_retried = False
+
+        for attempt in range(PERSIST_ATTEMPTS):
+            try:
+                async with AsyncSessionLocal() as session:
+                    # Sorted so concurrent transactions lock hierarchy rows in the same order
+                    upserted = [t for t in sorted(tuples) if await self.hierarchy.ensure(session, *t)]
+                    result = await session.execute(
+                        insert(Transcript).returning(Transcript.id, sort_by_parameter_order=True),
+                        rows
+                    )
+                    ids = result.scalars().all()
+                    await NodeStatsService.record(session, rows)
+                    await session.commit()
+
+                for t in upserted:
+                    self.hierarchy.remember(*t)
+                return list(ids)
+
+            except IntegrityError:
+                # Cached hierarchy is stale (rows removed out of band); upsert again once
+                for t in tuples:
+                    self.hierarchy.forget(*t)
+                if stale_retried or attempt == PERSIST_ATTEMPTS - 1:
+                    raise
+                stale_retried = True
+
+            except DBAPIError as e:
+                if attempt == PERSIST_ATTEMPTS - 1:
+                    raise
+                delay = PERSIST_BACKOFF_SECONDS * 2 ** attempt
+                logger.warning("Retrying transcript batch", rows=len(rows), attempt=attempt + 1,
+                               delay=delay, error=str(e.orig or e))
+                await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "buffered": len(self._buffer),
+            "batches": self.batches,
+            "rows": self.rows,
+            "avg_batch": round(self.rows / self.batches, 1) if self.batches else 0.0,
+        }
@@ -1,12 +1,22 @@
+import bisect
 import threading
+import numpy as np
 import structlog
 from pathlib import Path
-from faster_whisper import WhisperModel
-from typing import NamedTuple, List, Dict, Any
+from faster_whisper import WhisperModel, BatchedInferencePipeline, decode_audio
+from faster_whisper.vad import VadOptions, get_speech_timestamps, merge_segments
+from typing import NamedTuple, List, Dict, Any, Union
 
 logger = structlog.get_logger("transcription_service")
 _thread_local = threading.local()
 
+SAMPLE_RATE = 16000
+CHUNK_SECONDS = 30   # Whisper's fixed encoder window
+
+def _rebase(seconds: float, shift: float) -> float:
+    """Batch timeline time -> file time, at Whisper's millisecond precision."""
+    return max(0.0, round(seconds - shift, 3))
+
 class TranscriptResult(NamedTuple):
     text: str
     segments: List[Dict[str, Any]]
@@ -21,6 +31,8 @@ class TranscriptionService:
         self.models_dir = settings.models_dir
         self.device = settings.device
         self.compute_type = settings.compute_type
+        self._shared_model: WhisperModel | None = None
+        self._shared_lock = threading.Lock()
 
     def ensure_model_ready(self):
         """
@@ -28,31 +40,59 @@ class TranscriptionService:
         the first request. Call this during app startup.
         """
         logger.info("Checking Whisper model for readiness", model=self.model_name, dir=str(self.models_dir))
-        _ = WhisperModel(
-            self.model_name,
+        if self.settings.whisper_shared_model:
+            # Load the shared instance now so the first job doesn't pay for it
+            self._get_shared_model()
+        else:
+            _ = self._load_model()
+        if self.settings.transcription_batch_size > 1 and not self.settings.whisper_language:
+            logger.warning("Batched transcription detects the language once per batch; "
+                           "set ECHO_WHISPER_LANGUAGE unless all traffic is in one language",
+                           batch_size=self.settings.transcription_batch_size)
+        logger.info("Model is verified and ready", model=self.model_name)
+
+    def _load_model(self, num_workers: int = 1) -> WhisperModel:
+        return WhisperModel(
+            self.model_name, 
             device=self.device, 
             compute_type=self.compute_type,
+            cpu_threads=self.settings.whisper_cpu_threads,
+            num_workers=num_workers,
             download_root=str(self.models_dir),
             local_files_only=True
         )
-        logger.info("Model is verified and ready", model=self.model_name)
+
+    def _get_shared_model(self) -> WhisperModel:
+        """
+        A single Whisper instance shared by all threads. CTranslate2 runs up to
+        `num_workers` transcribe() calls in parallel on it, so memory stays flat
+        regardless of how many pipeline workers there are.
+        """
+        with self._shared_lock:
+            if self._shared_model is None:
+                num_workers = self.settings.whisper_num_workers or self.settings.transcription_workers
+                logger.info("Loading shared Whisper model", model=self.model_name, num_workers=num_workers)
+                self._shared_model = self._load_model(num_workers=num_workers)
+            return self._shared_model
 
     def _get_model(self) -> WhisperModel:
         """
         Each thread gets its own Whisper instance to enable true parallelism 
-        without lock contention.
+        without lock contention, unless the shared model mode is enabled.
         """
+        if self.settings.whisper_shared_model:
+            return self._get_shared_model()
+
         if not hasattr(_thread_local, "model"):
             logger.info("Loading Whisper model on thread", model=self.model_name, thread=threading.current_thread().name)
-            _thread_local.model = WhisperModel(
-                self.model_name, 
-                device=self.device, 
-                compute_type=self.compute_type,
-                download_root=str(self.models_dir),
-                local_files_only=True
-            )
+            _thread_local.model = self._load_model()
         return _thread_local.model
 
+    def _get_batched_pipeline(self) -> BatchedInferencePipeline:
+        if not hasattr(_thread_local, "batched"):
+            _thread_local.batched = BatchedInferencePipeline(model=self._get_model())
+        return _thread_local.batched
+
     def transcribe(self, audio_path: str) -> TranscriptResult:
         model = self._get_model()
         logger.info("Transcribing audio file", path=audio_path)
@@ -89,3 +129,101 @@ class TranscriptionService:
             language_probability=info.language_probability,
             duration=info.duration
         )
+
+    def _clip_timestamps(self, audio: np.ndarray) -> List[Dict[str, int]]:
+        """
+        Splits one job's audio into <=30s clips (in samples), using VAD when enabled.
+        """
+        if self.settings.vad_filter:
+            vad_options = VadOptions(
+                min_silence_duration_ms=self.settings.vad_min_silence_duration_ms,
+                max_speech_duration_s=CHUNK_SECONDS
+            )
+            speech = get_speech_timestamps(audio, vad_options)
+            return [
+                {"start": c["start"], "end": c["end"]}
+                for c in merge_segments(speech, vad_options)
+            ]
+
+        window = CHUNK_SECONDS * SAMPLE_RATE
+        return [
+            {"start": start, "end": min(start + window, audio.shape[0])}
+            for start in range(0, audio.shape[0], window)
+        ]
+
+    def transcribe_batch(self, audio_paths: List[str]) -> List[Union[TranscriptResult, Exception]]:
+        """
+        Transcribes several independent files in one batched Whisper pass.
+
+        Each file is decoded and split into clips, the clips of all files are laid
+        out on one timeline and decoded together by BatchedInferencePipeline, then
+        the resulting segments are split back per file. A file that fails to
+        decode gets its exception in place of a result and is left out of the
+        pass. Language is detected once for the whole batch, so set
+        `whisper_language` when running in this mode.
+        """
+        audios: List[Union[np.ndarray, Exception]] = []
+        for path in audio_paths:
+            try:
+                audios.append(decode_audio(path, sampling_rate=SAMPLE_RATE))
+            except Exception as e:
+                logger.error("Failed to decode audio", path=path, error=str(e))
+                audios.append(e)
+        decoded = [i for i, audio in enumerate(audios) if not isinstance(audio, Exception)]
+
+        offsets: Dict[int, int] = {}
+        clips = []
+        owners = []   # file index of each clip
+        cursor = 0
+        for i in decoded:
+            offsets[i] = cursor
+            for c in self._clip_timestamps(audios[i]):
+                clips.append({"start": c["start"] + cursor, "end": c["end"] + cursor})
+                owners.append(i)
+            cursor += audios[i].shape[0]
+
+        logger.info("Transcribing audio batch", files=len(decoded), failed=len(audio_paths) - len(decoded), clips=len(clips))
+
+        per_file: Dict[int, List[Dict[str, Any]]] = {i: [] for i in decoded}
+        if clips:
+            pipeline = self._get_batched_pipeline()
+            segments, info = pipeline.transcribe(
+                np.concatenate([audios[i] for i in decoded]),
+                beam_size=self.settings.beam_size,
+                word_timestamps=self.settings.word_timestamps,
+                language=self.settings.whisper_language,
+                initial_prompt=self.settings.initial_prompt,
+                clip_timestamps=clips,
+                batch_size=self.settings.transcription_batch_size
+            )
+            language, language_probability = info.language, info.language_probability
+
+            clip_starts = [c["start"] / SAMPLE_RATE for c in clips]
+            for segment in segments:
+                # Segment times are rounded, so locate the clip by the segment's
+                # midpoint rather than its start; clips never cross files
+                midpoint = (segment.start + segment.end) / 2
+                idx = owners[max(0, bisect.bisect_right(clip_starts, midpoint) - 1)]
+                shift = offsets[idx] / SAMPLE_RATE
+                per_file[idx].append({
+                    "start": _rebase(segment.start, shift),
+                    "end": _rebase(segment.end, shift),
+                    "text": segment.text.strip(),
+                    "words": [
+                        {"word": w.word, "start": _rebase(w.start, shift), "end": _rebase(w.end, shift), "probability": w.probability}
+                        for w in (segment.words or [])
+                    ]
+                })
+        else:
+            language, language_probability = self.settings.whisper_language, 0.0
+
+        return [
+            audio if isinstance(audio, Exception) else TranscriptResult(
+                text=" ".join(seg["text"] for seg in per_file[i]),
+                segments=per_file[i],
+                language=language,
+                language_probability=language_probability,
+                duration=audio.shape[0] / SAMPLE_RATE
+            )
+            for i, audio in enumerate(audios)
+        ]
@@ -1,37 +1,388 @@
+import csv
+import difflib
+import io
+import json
+import re
 import structlog
-from sqlalchemy.orm import Session
-from sqlalchemy import select, desc
+import zlib
+from datetime import datetime
+from typing import Any, AsyncIterator, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import String, select, desc, func, literal, and_, or_
+from app.db.database import AsyncSessionLocal
 from app.models.dbmodels import Transcript
+from app.schemas.transcript import SearchResult, TranscriptDetail, TranscriptOut, TranscriptPage, WordTiming
+from app.utils.segment_codec import decode_segments, words_between
 
 logger = structlog.get_logger("transcripts_service")
 
+# Columns backing TranscriptOut; list queries never touch the heavy JSON columns
+LIST_COLUMNS = (
+    Transcript.id,
+    Transcript.node_id,
+    Transcript.organization_id,
+    Transcript.station_id,
+    Transcript.received_at,
+    Transcript.recorded_at,
+    Transcript.duration_seconds,
+    Transcript.raw_text,
+    Transcript.audio_path,
+    Transcript.language,
+)
+
+# Columns written by the bulk export, in CSV column order
+EXPORT_COLUMNS = LIST_COLUMNS + (
+    Transcript.language_probability,
+    Transcript.processed_at,
+    Transcript.processed_json,
+)
+
+EXPORT_BATCH_ROWS = 1000
+
+def _json_default(value: Any) -> str:
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+def _segments(blob: Optional[bytes], legacy: Any) -> List[dict]:
+    """Segments from the packed column, falling back to rows written as JSON."""
+    if blob is not None:
+        return decode_segments(blob)
+    if isinstance(legacy, str):
+        legacy = json.loads(legacy)
+    return legacy or []
+
 class TranscriptsService:
     @staticmethod
-    def get_by_org(session: Session, org_id: str, limit: int = 50):
-        stmt = select(Transcript).where(Transcript.organization_id == org_id).order_by(desc(Transcript.id)).limit(limit)
-        return session.execute(stmt).scalars().all()
+    async def _page(
+        session: AsyncSession,
+        filters: List[Any],
+        limit: int,
+        cursor: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> TranscriptPage:
+        """
+        Keyset page ordered by `id DESC`: `cursor` is the last ID of the previous
+        page, so every page is an index range scan no matter how deep it is.
+        """
+        stmt = select(*LIST_COLUMNS).where(*filters)
+        if cursor is not None:
+            stmt = stmt.where(Transcript.id < cursor)
+        if since is not None:
+            stmt = stmt.where(Transcript.received_at >= since)
+        if until is not None:
+            stmt = stmt.where(Transcript.received_at < until)
+        stmt = stmt.order_by(desc(Transcript.id)).limit(limit + 1)
+
+        rows = (await session.execute(stmt)).all()
+        items = [TranscriptOut.model_validate(r) for r in rows[:limit]]
+        return TranscriptPage(
+            items=items,
+            limit=limit,
+            next_cursor=str(items[-1].id) if len(rows) > limit else None
+        )
+
+    @staticmethod
+    async def get_one(session: AsyncSession, org_id: str, transcript_id: int) -> Optional[TranscriptOut]:
+        stmt = select(*LIST_COLUMNS).where(
+            Transcript.id == transcript_id,
+            Transcript.organization_id == org_id
+        )
+        row = (await session.execute(stmt)).one_or_none()
+        return TranscriptOut.model_validate(row) if row else None
+
+    @staticmethod
+    async def get_detail(session: AsyncSession, org_id: str, transcript_id: int) -> Optional[TranscriptDetail]:
+        """Single transcript including segments/word timings and the LLM analysis."""
+        stmt = select(
+            *LIST_COLUMNS,
+            Transcript.language_probability,
+            Transcript.segments_blob,
+            Transcript.segments_json,
+            Transcript.processed_at,
+            Transcript.processed_json
+        ).where(
+            Transcript.id == transcript_id,
+            Transcript.organization_id == org_id
+        )
+        row = (await session.execute(stmt)).one_or_none()
+        if row is None:
+            return None
+
+        return TranscriptDetail(
+            **TranscriptOut.model_validate(row).model_dump(),
+            language_probability=row.language_probability,
+            segments=_segments(row.segments_blob, row.segments_json),
+            processed_at=row.processed_at,
+            processed_json=row.processed_json
+        )
+
+    @staticmethod
+    async def get_words(
+        session: AsyncSession,
+        org_id: str,
+        transcript_id: int,
+        start: Optional[float] = None,
+        end: Optional[float] = None
+    ) -> Optional[List[WordTiming]]:
+        """Word timings overlapping [start, end] seconds, e.g. the words between t=12s and t=18s."""
+        stmt = select(Transcript.segments_blob, Transcript.segments_json).where(
+            Transcript.id == transcript_id,
+            Transcript.organization_id == org_id
+        )
+        row = (await session.execute(stmt)).one_or_none()
+        if row is None:
+            return None
+
+        if row.segments_blob is not None:
+            words = words_between(row.segments_blob, start, end)
+        else:
+            words = [
+                w for seg in _segments(None, row.segments_json) for w in seg.get("words") or []
+                if (start is None or w["end"] >= start) and (end is None or w["start"] <= end)
+            ]
+        return [WordTiming(**w) for w in words]
+
+    @staticmethod
+    async def get_by_org(session: AsyncSession, org_id: str, limit: int = 50, **window: Any) -> TranscriptPage:
+        return await TranscriptsService._page(session, [Transcript.organization_id == org_id], limit, **window)
 
     @staticmethod
-    def get_by_station(session: Session, org_id: str, station_id: str, limit: int = 50):
-        stmt = select(Transcript).where(
+    async def get_by_station(session: AsyncSession, org_id: str, station_id: str, limit: int = 50, **window: Any) -> TranscriptPage:
+        return await TranscriptsService._page(session, [
             Transcript.organization_id == org_id,
             Transcript.station_id == station_id
-        ).order_by(desc(Transcript.id)).limit(limit)
-        return session.execute(stmt).scalars().all()
+        ], limit, **window)
 
     @staticmethod
-    def get_by_node(session: Session, org_id: str, node_id: str, limit: int = 50):
-        stmt = select(Transcript).where(
+    async def get_by_node(session: AsyncSession, org_id: str, node_id: str, limit: int = 50, **window: Any) -> TranscriptPage:
+        return await TranscriptsService._page(session, [
             Transcript.organization_id == org_id,
             Transcript.node_id == node_id
-        ).order_by(desc(Transcript.id)).limit(limit)
-        return session.execute(stmt).scalars().all()
+        ], limit, **window)
+
+    HEADLINE_OPTIONS = "StartSel=<b>, StopSel=</b>, MaxWords=25, MinWords=8, MaxFragments=2"
+
+    @staticmethod
+    def _build_tsquery(query: str):
+        """
+        Web-search syntax ("quoted phrases", or, -exclusions) plus prefix terms
+        written with a trailing `*`, e.g. `gulb*` (or `-gulb*` to exclude them).
+        """
+        prefixes = []
+        for w in query.split():
+            if not w.endswith("*"):
+                continue
+            # The exclusion is read before \W stripping would discard the "-"
+            negate = "!" if w.startswith("-") else ""
+            term = re.sub(r"\W", "", w[:-1].lstrip("-"))
+            if term:
+                prefixes.append(f"{negate}{term}:*")
+        rest = " ".join(w for w in query.split() if not w.endswith("*"))
+
+        tsquery = func.websearch_to_tsquery("english", rest) if rest.strip() else None
+        if prefixes:
+            prefix_query = func.to_tsquery("english", " & ".join(prefixes))
+            tsquery = prefix_query if tsquery is None else tsquery.op("&&")(prefix_query)
+        return tsquery
 
     @staticmethod
-    def search(session: Session, org_id: str, query: str, limit: int = 5):
-        # Fuzzy match using ILIKE
-        stmt = select(Transcript).where(
+    def _match_start(segments: List[dict], query: str) -> Optional[float]:
+        """Start time of the first segment containing any of the query terms."""
+        words = " ".join(w for w in query.lower().split() if not w.startswith("-") and w != "or")
+        terms = re.findall(r"\w+", words)
+        for seg in segments:
+            text = seg.get("text", "").lower()
+            if any(t in text for t in terms):
+                return seg.get("start")
+        return None
+
+    @staticmethod
+    def _fuzzy_snippet(text: str, query: str, width: int = 12) -> str:
+        """Highlights the run of words most similar to `query` and keeps some context around it."""
+        words = text.split()
+        n = max(1, len(query.split()))
+        best, best_at = 0.0, 0
+        for i in range(len(words)):
+            candidate = " ".join(words[i:i + n]).lower()
+            ratio = difflib.SequenceMatcher(None, query.lower(), candidate).ratio()
+            if ratio > best:
+                best, best_at = ratio, i
+        start = max(0, best_at - width)
+        head = words[start:best_at]
+        hit = words[best_at:best_at + n]
+        tail = words[best_at + n:best_at + n + width]
+        return " ".join(head + [f"<b>{' '.join(hit)}</b>"] + tail)
+
+    @staticmethod
+    async def fuzzy_search(
+        session: AsyncSession,
+        org_id: str,
+        query: str,
+        station_id: Optional[str] = None,
+        threshold: float = 0.5,
+        limit: int = 10
+    ) -> List[SearchResult]:
+        """
+        Trigram word-similarity search over transcript text and LLM-extracted
+        entities, for misheard call-signs and place names. The `<%` operator is
+        served by the gin_trgm_ops indexes; `threshold` sets
+        pg_trgm.word_similarity_threshold for this transaction only.
+        """
+        await session.execute(
+            select(func.set_config("pg_trgm.word_similarity_threshold", str(threshold), True))
+        )
+
+        score = func.greatest(
+            func.word_similarity(query, Transcript.raw_text),
+            func.word_similarity(query, func.coalesce(Transcript.entity_text, ""))
+        )
+        stmt = select(
+            Transcript.id,
+            Transcript.node_id,
+            Transcript.organization_id,
+            Transcript.station_id,
+            Transcript.received_at,
+            Transcript.audio_path,
+            Transcript.raw_text,
+            Transcript.segments_blob,
+            Transcript.segments_json,
+            score.label("score")
+        ).where(
+            Transcript.organization_id == org_id,
+            or_(
+                literal(query, String).op("<%")(Transcript.raw_text),
+                literal(query, String).op("<%")(Transcript.entity_text)
+            )
+        )
+        if station_id:
+            stmt = stmt.where(Transcript.station_id == station_id)
+        stmt = stmt.order_by(desc("score"), desc(Transcript.id)).limit(limit)
+
+        rows = (await session.execute(stmt)).all()
+        results = []
+        for r in rows:
+            snippet = TranscriptsService._fuzzy_snippet(r.raw_text, query)
+            hit = re.search(r"<b>(.*?)</b>", snippet)
+            results.append(SearchResult(
+                id=r.id,
+                node_id=r.node_id,
+                organization_id=r.organization_id,
+                station_id=r.station_id,
+                received_at=r.received_at,
+                audio_path=r.audio_path,
+                snippet=snippet,
+                rank=r.score,
+                segment_start=TranscriptsService._match_start(
+                    _segments(r.segments_blob, r.segments_json), hit.group(1)
+                ) if hit else None
+            ))
+        return results
+
+    @staticmethod
+    async def search(session: AsyncSession, org_id: str, query: str, limit: int = 5) -> List[SearchResult]:
+        """
+        Ranked full-text search over the GIN-indexed `search_vector`. Snippets and
+        segment offsets are only computed for the page of hits being returned.
+        """
+        tsquery = TranscriptsService._build_tsquery(query)
+        if tsquery is None:
+            return []
+
+        rank = func.ts_rank_cd(Transcript.search_vector, tsquery)
+        hits = select(Transcript.id, Transcript.received_at, rank.label("rank")).where(
             Transcript.organization_id == org_id,
-            Transcript.raw_text.ilike(f"%{query}%")
-        ).order_by(desc(Transcript.id)).limit(limit)
-        return session.execute(stmt).scalars().all()
+            Transcript.search_vector.op("@@")(tsquery)
+        ).order_by(desc("rank"), desc(Transcript.id)).limit(limit).subquery()
+
+        stmt = select(
+            Transcript.id,
+            Transcript.node_id,
+            Transcript.organization_id,
+            Transcript.station_id,
+            Transcript.received_at,
+            Transcript.audio_path,
+            Transcript.segments_blob,
+            Transcript.segments_json,
+            hits.c.rank,
+            func.ts_headline("english", Transcript.raw_text, tsquery, TranscriptsService.HEADLINE_OPTIONS).label("snippet")
+        ).join(
+            # received_at is the partition key: lets each hit's lookup prune to one partition
+            hits, and_(hits.c.id == Transcript.id, hits.c.received_at == Transcript.received_at)
+        ).order_by(desc(hits.c.rank), desc(Transcript.id))
+
+        rows = (await session.execute(stmt)).all()
+        return [
+            SearchResult(
+                id=r.id,
+                node_id=r.node_id,
+                organization_id=r.organization_id,
+                station_id=r.station_id,
+                received_at=r.received_at,
+                audio_path=r.audio_path,
+                snippet=r.snippet,
+                rank=r.rank,
+                segment_start=TranscriptsService._match_start(_segments(r.segments_blob, r.segments_json), query)
+            )
+            for r in rows
+        ]
+
+    @staticmethod
+    def _encode_batch(rows: List[Any], fmt: str, header: bool) -> bytes:
+        if fmt == "csv":
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            if header:
+                writer.writerow([c.key for c in EXPORT_COLUMNS])
+            for r in rows:
+                writer.writerow([
+                    json.dumps(v) if isinstance(v, dict) else ("" if v is None else v)
+                    for v in r
+                ])
+            return buf.getvalue().encode("utf-8")
+        return "".join(json.dumps(r._asdict(), default=_json_default) + "\n" for r in rows).encode("utf-8")
+
+    @staticmethod
+    async def export(
+        org_id: str,
+        since: datetime,
+        until: datetime,
+        station_id: Optional[str] = None,
+        node_id: Optional[str] = None,
+        fmt: str = "ndjson",
+        compress: bool = False
+    ) -> AsyncIterator[bytes]:
+        """
+        Streams matching transcripts as NDJSON or CSV (optionally gzip).
+
+        Rows come from a server-side cursor `EXPORT_BATCH_ROWS` at a time, so
+        memory stays flat regardless of the export size. Opens its own session
+        because the response outlives the request-scoped one.
+        """
+        stmt = select(*EXPORT_COLUMNS).where(
+            Transcript.organization_id == org_id,
+            Transcript.received_at >= since,
+            Transcript.received_at < until
+        )
+        if station_id:
+            stmt = stmt.where(Transcript.station_id == station_id)
+        if node_id:
+            stmt = stmt.where(Transcript.node_id == node_id)
+        stmt = stmt.order_by(Transcript.id).execution_options(yield_per=EXPORT_BATCH_ROWS)
+
+        gzipper = zlib.compressobj(wbits=31) if compress else None
+        header = True
+        exported = 0
+        async with AsyncSessionLocal() as session:
+            result = await session.stream(stmt)
+            async for rows in result.partitions():
+                chunk = TranscriptsService._encode_batch(rows, fmt, header)
+                header = False
+                exported += len(rows)
+                yield gzipper.compress(chunk) if gzipper else chunk
+
+        if fmt == "csv" and header:
+            chunk = TranscriptsService._encode_batch([], fmt, header)
+            yield gzipper.compress(chunk) if gzipper else chunk
+        if gzipper:
+            yield gzipper.flush()
+        logger.info("Transcript export finished", org_id=org_id, rows=exported, format=fmt)
@@ -0,0 +1,84 @@
+import re
+import threading
+import structlog
+from typing import Any, Dict, List, NamedTuple
+
+logger = structlog.get_logger("triage")
+
+_WORDS = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+# Terms that indicate an actual incident. Weighted so a single strong term is
+# enough to escalate to the LLM while weaker ones need company.
+INCIDENT_TERMS: Dict[str, float] = {
+    # life safety
+    "mayday": 2.0, "emergency": 1.0, "help": 0.5, "injured": 1.0, "injury": 1.0,
+    "unconscious": 1.0, "bleeding": 1.0, "casualty": 1.0, "casualties": 1.0,
+    "dead": 1.0, "body": 0.5, "ambulance": 1.0, "cpr": 1.0, "trapped": 1.0,
+    # violence / crime
+    "shot": 1.0, "shots": 1.0, "gun": 1.0, "weapon": 1.0, "armed": 1.0,
+    "stabbing": 1.0, "assault": 1.0, "robbery": 1.0, "hostage": 2.0,
+    "suspect": 0.5, "pursuit": 1.0, "backup": 0.5, "officer down": 2.0,
+    # fire / hazards
+    "fire": 1.0, "smoke": 0.5, "explosion": 1.0, "blast": 1.0, "gas leak": 1.0,
+    "flood": 1.0, "collapse": 1.0, "collapsed": 1.0,
+    # traffic
+    "accident": 1.0, "crash": 1.0, "collision": 1.0, "overturned": 1.0,
+    # radio codes
+    "10-33": 2.0, "10-50": 1.0, "10-52": 1.0, "code 3": 1.0,
+}
+
+class TriageDecision(NamedTuple):
+    needs_llm: bool
+    score: float
+    matched: List[str]
+
+class TriageService:
+    """
+    CPU-cheap lexicon classifier run before the LLM. Short transmissions with
+    no incident vocabulary ("10-4", "copy that, en route") are treated as
+    routine and get a default analysis; everything else goes to llama.cpp.
+    """
+    def __init__(self, settings: Any):
+        self.settings = settings
+        self.terms = dict(INCIDENT_TERMS)
+        for term in settings.triage_extra_keywords:
+            self.terms[term.lower()] = 1.0
+        self._lock = threading.Lock()
+        self.evaluated = 0
+        self.skipped = 0
+
+    def enabled_for(self, organization_id: str) -> bool:
+        return self.settings.triage_org_overrides.get(organization_id, self.settings.triage_enabled)
+
+    def classify(self, text: str) -> TriageDecision:
+        words = _WORDS.findall(text.lower())
+        grams = set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+        matched = sorted(g for g in grams if g in self.terms)
+        score = sum(self.terms[g] for g in matched)
+
+        needs_llm = score >= 1.0 or len(words) > self.settings.triage_max_routine_words
+        with self._lock:
+            self.evaluated += 1
+            if not needs_llm:
+                self.skipped += 1
+        return TriageDecision(needs_llm=needs_llm, score=score, matched=matched)
+
+    @staticmethod
+    def routine_analysis(text: str) -> Dict[str, Any]:
+        """Default result for routine traffic, shaped like the grammar's output."""
+        return {
+            "summary": text.strip(),
+            "incident_type": "routine",
+            "urgency": "low",
+            "entities": []
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.settings.triage_enabled,
+                "org_overrides": len(self.settings.triage_org_overrides),
+                "evaluated": self.evaluated,
+                "skipped_llm": self.skipped,
+                "skip_rate": round(self.skipped / self.evaluated, 3) if self.evaluated else 0.0,
+            }
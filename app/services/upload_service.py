@@ -0,0 +1,156 @@
+import asyncio
+import json
+import time
+import uuid
+import structlog
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional
+from fastapi import HTTPException, status
+from starlette.requests import ClientDisconnect
+
+from app.utils.executors import PipelineExecutors
+
+logger = structlog.get_logger("upload_service")
+
+WRITE_BYTES = 1024 * 1024
+
+class UploadService:
+    """
+    Resumable uploads for unreliable links. Each upload is a `.part` spool file
+    plus a JSON sidecar under `{audio_dir}/{organization_id}/.uploads/`, on the
+    same filesystem as the final audio so completion is a rename. The current
+    offset is the spool file's size, so it survives crashes and restarts.
+    """
+    def __init__(self, settings: Any, executors: PipelineExecutors):
+        self.settings = settings
+        self.executors = executors
+        self.ttl = timedelta(hours=settings.upload_ttl_hours)
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _dir(self, organization_id: str) -> Path:
+        return self.settings.audio_dir / organization_id / ".uploads"
+
+    def spool_path(self, organization_id: str, upload_id: str) -> Path:
+        return self._dir(organization_id) / f"{upload_id}.part"
+
+    def _meta_path(self, organization_id: str, upload_id: str) -> Path:
+        return self._dir(organization_id) / f"{upload_id}.json"
+
+    def lock(self, upload_id: str) -> asyncio.Lock:
+        """Serializes appends and completion of one upload."""
+        return self._locks.setdefault(upload_id, asyncio.Lock())
+
+    # Blocking helpers, run on the io executor
+
+    def _create(self, organization_id: str, meta: Dict[str, Any]) -> Dict[str, Any]:
+        self._purge_expired(organization_id)
+        upload_id = uuid.uuid4().hex
+        now = datetime.now()
+        state = {
+            **meta,
+            "upload_id": upload_id,
+            "organization_id": organization_id,
+            "created_at": now.isoformat(),
+            "expires_at": (now + self.ttl).isoformat(),
+        }
+        self._dir(organization_id).mkdir(parents=True, exist_ok=True)
+        self.spool_path(organization_id, upload_id).touch()
+        self._meta_path(organization_id, upload_id).write_text(json.dumps(state))
+        return {**state, "offset": 0}
+
+    def _load(self, organization_id: str, upload_id: str) -> Optional[Dict[str, Any]]:
+        if not upload_id.isalnum():
+            return None
+        try:
+            state = json.loads(self._meta_path(organization_id, upload_id).read_text())
+            state["offset"] = self.spool_path(organization_id, upload_id).stat().st_size
+        except (FileNotFoundError, ValueError):
+            return None
+        if datetime.fromisoformat(state["expires_at"]) < datetime.now():
+            self._remove(organization_id, upload_id)
+            return None
+        return state
+
+    def _write(self, path: Path, data: bytes):
+        with open(path, "ab") as f:
+            f.write(data)
+
+    def _remove(self, organization_id: str, upload_id: str):
+        self._meta_path(organization_id, upload_id).unlink(missing_ok=True)
+        self.spool_path(organization_id, upload_id).unlink(missing_ok=True)
+
+    def _remove_consumed(self, organization_id: str, upload_id: str) -> bool:
+        if self.spool_path(organization_id, upload_id).exists():
+            return False
+        self._meta_path(organization_id, upload_id).unlink(missing_ok=True)
+        return True
+
+    def _purge_expired(self, organization_id: str):
+        directory = self._dir(organization_id)
+        if not directory.exists():
+            return
+        cutoff = time.time() - self.ttl.total_seconds()
+        for meta_path in directory.glob("*.json"):
+            if meta_path.stat().st_mtime < cutoff:
+                self._load(organization_id, meta_path.stem)   # removes it once expired
+
+    # Async API
+
+    async def create(self, organization_id: str, meta: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.executors.io.run(self._create, organization_id, meta)
+
+    async def get(self, organization_id: str, upload_id: str) -> Optional[Dict[str, Any]]:
+        return await self.executors.io.run(self._load, organization_id, upload_id)
+
+    async def append(self, organization_id: str, upload_id: str, offset: int, body: AsyncIterator[bytes]) -> int:
+        """
+        Appends a request body at `offset`, which must equal the current offset.
+        Bytes received before a dropped connection are kept, so the client can
+        resume from the offset reported afterwards. Returns the new offset.
+        """
+        async with self.lock(upload_id):
+            state = await self.get(organization_id, upload_id)
+            if state is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+            if offset != state["offset"]:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"Upload-Offset mismatch: expected {state['offset']}",
+                    headers={"Upload-Offset": str(state["offset"])}
+                )
+
+            path = self.spool_path(organization_id, upload_id)
+            current = state["offset"]
+            buffered: list = []
+            pending = 0
+            try:
+                async for chunk in body:
+                    if current + pending + len(chunk) > state["length"]:
+                        buffered, pending = [], 0
+                        raise HTTPException(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"Data past the declared Upload-Length of {state['length']} bytes"
+                        )
+                    buffered.append(chunk)
+                    pending += len(chunk)
+                    if pending >= WRITE_BYTES:
+                        await self.executors.io.run(self._write, path, b"".join(buffered))
+                        current += pending
+                        buffered, pending = [], 0
+            except ClientDisconnect:
+                logger.info("Upload interrupted", upload_id=upload_id, offset=current + pending)
+            finally:
+                if buffered:
+                    await self.executors.io.run(self._write, path, b"".join(buffered))
+                    current += pending
+            return current
+
+    async def remove(self, organization_id: str, upload_id: str):
+        await self.executors.io.run(self._remove, organization_id, upload_id)
+        self._locks.pop(upload_id, None)
+
+    async def remove_consumed(self, organization_id: str, upload_id: str):
+        """Removes the upload once its spool file has been stored or discarded; keeps it otherwise."""
+        if await self.executors.io.run(self._remove_consumed, organization_id, upload_id):
+            self._locks.pop(upload_id, None)
@@ -1,7 +1,8 @@
 import re
-import io
 import soundfile as sf
-from fastapi import UploadFile, HTTPException, status
+from pathlib import Path
+from typing import Optional
+from fastapi import HTTPException, status
 from app.core.config import Settings
 
 class AudioInfo:
@@ -17,7 +18,8 @@ class AudioValidator:
     }
 
     @classmethod
-    def validate(cls, file: UploadFile, node_id: str, settings: Settings) -> AudioInfo:
+    def validate_request(cls, content_type: Optional[str], node_id: str):
+        """Cheap checks done on the event loop before any audio is written."""
         # 1. Node ID validation
         if not cls.NODE_ID_REGEX.match(node_id):
             raise HTTPException(
@@ -26,46 +28,47 @@ class AudioValidator:
             )
 
         # 2. MIME type validation
-        if file.content_type not in cls.ALLOWED_MIME_TYPES:
+        if content_type not in cls.ALLOWED_MIME_TYPES:
             raise HTTPException(
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail=f"Unsupported format: {file.content_type}"
+                detail=f"Unsupported format: {content_type}"
             )
 
-        return cls._validate_media(file, settings)
-
     @staticmethod
-    def _validate_media(file: UploadFile, settings: Settings) -> AudioInfo:
-        # Seek to start just in case
-        file.file.seek(0)
-        content = file.file.read()
-        
-        if len(content) > settings.max_audio_size_bytes:
+    def check_size(size: int, settings: Settings):
+        if size > settings.max_audio_size_bytes:
             raise HTTPException(
                 status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail=f"File too large: {len(content)} bytes"
+                detail=f"File too large (max {settings.max_audio_size_bytes} bytes)"
             )
 
-        if len(content) == 0:
+        if size == 0:
              raise HTTPException(
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                 detail="Empty audio file"
             )
 
+    @staticmethod
+    def validate_file(path: Path, settings: Settings) -> AudioInfo:
+        """
+        Parses the header of a spooled file for its duration. Blocking; run it
+        on the io executor.
+        """
         try:
             # Soundfile check for duration
-            with sf.SoundFile(io.BytesIO(content)) as f:
+            with sf.SoundFile(str(path)) as f:
                 duration = len(f) / f.samplerate
-                if duration > settings.max_audio_duration_seconds:
-                    raise HTTPException(
-                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                        detail=f"Audio too long: {duration:.1f}s (max {settings.max_audio_duration_seconds}s)"
-                    )
-                return AudioInfo(duration=duration, sample_rate=f.samplerate)
+                sample_rate = f.samplerate
         except Exception as e:
+            # libsndfile errors embed the (server-side) path; report only the reason
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Invalid or corrupt audio file: {getattr(e, 'error_string', None) or type(e).__name__}"
+            )
+
+        if duration > settings.max_audio_duration_seconds:
             raise HTTPException(
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                detail=f"Invalid or corrupt audio file: {str(e)}"
+                detail=f"Audio too long: {duration:.1f}s (max {settings.max_audio_duration_seconds}s)"
             )
-        finally:
-            file.file.seek(0)
+        return AudioInfo(duration=duration, sample_rate=sample_rate)
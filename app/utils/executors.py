@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import time
+import structlog
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+logger = structlog.get_logger("executors")
+
+class StageExecutor:
+    """
+    A bounded thread pool dedicated to one pipeline stage, recording how long
+    work waits for a free thread and how long it runs.
+    """
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"echo-{name}")
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._completed = 0
+        self._active = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._submitted += 1
+        return await loop.run_in_executor(self._pool, self._timed, time.monotonic(), fn, *args)
+
+    def _timed(self, submitted_at: float, fn: Callable[..., Any], *args: Any) -> Any:
+        started_at = time.monotonic()
+        wait = started_at - submitted_at
+        with self._lock:
+            self._active += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._completed += 1
+                self._run_total += time.monotonic() - started_at
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            done = self._completed or 1
+            return {
+                "max_workers": self.max_workers,
+                "active": self._active,
+                "queued": self._submitted - self._completed - self._active,
+                "completed": self._completed,
+                "avg_wait_ms": round(self._wait_total / done * 1000, 2),
+                "max_wait_ms": round(self._wait_max * 1000, 2),
+                "avg_run_ms": round(self._run_total / done * 1000, 2),
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+class PipelineExecutors:
+    """
+    Separate executors so Whisper, llama.cpp and blocking I/O never compete
+    for the same threads.
+    """
+    def __init__(self, settings: Any):
+        self.transcription = StageExecutor("transcription", settings.transcription_workers)
+        self.llm = StageExecutor("llm", settings.llm_workers)
+        self.io = StageExecutor("io", settings.io_workers)
+        logger.info("Stage executors ready",
+                    transcription=self.transcription.max_workers,
+                    llm=self.llm.max_workers,
+                    io=self.io.max_workers)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            "transcription": self.transcription.stats(),
+            "llm": self.llm.stats(),
+            "io": self.io.stats(),
+        }
+
+    def shutdown(self):
+        for executor in (self.transcription, self.llm, self.io):
+            executor.shutdown()
@@ -0,0 +1,106 @@
+import struct
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+# Compact columnar encoding for Whisper segments and word timings.
+#
+# Layout (little-endian):
+#   header       magic "ESG1", uint32 n_segments, uint32 n_words, uint32 segment_text_bytes
+#   segments     float32 start[n], float32 end[n],
+#                uint32 word_offsets[n + 1]   (index into the word arrays)
+#                uint32 text_offsets[n + 1]   (byte offsets into the segment text blob)
+#   words        float32 start[m], float32 end[m], float32 probability[m],
+#                uint32 text_offsets[m + 1]   (byte offsets into the word text blob)
+#   blobs        segment text (utf-8), word text (utf-8)
+
+MAGIC = b"ESG1"
+_HEADER = struct.Struct("<4sIII")
+_F32 = np.dtype("<f4")
+_U32 = np.dtype("<u4")
+
+def _offsets(texts: List[bytes]) -> np.ndarray:
+    offsets = np.zeros(len(texts) + 1, dtype=_U32)
+    np.cumsum([len(t) for t in texts], out=offsets[1:])
+    return offsets
+
+def encode_segments(segments: List[Dict[str, Any]]) -> bytes:
+    seg_texts = [s["text"].encode("utf-8") for s in segments]
+    words = [w for s in segments for w in s.get("words") or []]
+    word_texts = [w["word"].encode("utf-8") for w in words]
+    word_counts = [len(s.get("words") or []) for s in segments]
+
+    word_offsets = np.zeros(len(segments) + 1, dtype=_U32)
+    np.cumsum(word_counts, out=word_offsets[1:])
+    seg_text_offsets = _offsets(seg_texts)
+    seg_blob = b"".join(seg_texts)
+
+    parts = [
+        _HEADER.pack(MAGIC, len(segments), len(words), len(seg_blob)),
+        np.array([s["start"] for s in segments], dtype=_F32).tobytes(),
+        np.array([s["end"] for s in segments], dtype=_F32).tobytes(),
+        word_offsets.tobytes(),
+        seg_text_offsets.tobytes(),
+        np.array([w["start"] for w in words], dtype=_F32).tobytes(),
+        np.array([w["end"] for w in words], dtype=_F32).tobytes(),
+        np.array([w["probability"] for w in words], dtype=_F32).tobytes(),
+        _offsets(word_texts).tobytes(),
+        seg_blob,
+        b"".join(word_texts),
+    ]
+    return b"".join(parts)
+
+class _Columns:
+    """Zero-copy views over an encoded blob."""
+    def __init__(self, blob: bytes):
+        magic, n, m, seg_blob_len = _HEADER.unpack_from(blob)
+        if magic != MAGIC:
+            raise ValueError("Not an encoded segment blob")
+        pos = _HEADER.size
+
+        def take(dtype: np.dtype, count: int) -> np.ndarray:
+            nonlocal pos
+            arr = np.frombuffer(blob, dtype=dtype, count=count, offset=pos)
+            pos += arr.nbytes
+            return arr
+
+        self.seg_start = take(_F32, n)
+        self.seg_end = take(_F32, n)
+        self.seg_words = take(_U32, n + 1)
+        self.seg_text = take(_U32, n + 1)
+        self.word_start = take(_F32, m)
+        self.word_end = take(_F32, m)
+        self.word_prob = take(_F32, m)
+        self.word_text = take(_U32, m + 1)
+        self.seg_blob = blob[pos:pos + seg_blob_len]
+        self.word_blob = blob[pos + seg_blob_len:]
+
+    def word(self, i: int) -> Dict[str, Any]:
+        return {
+            "word": self.word_blob[self.word_text[i]:self.word_text[i + 1]].decode("utf-8"),
+            "start": round(float(self.word_start[i]), 3),
+            "end": round(float(self.word_end[i]), 3),
+            "probability": round(float(self.word_prob[i]), 4),
+        }
+
+def decode_segments(blob: bytes) -> List[Dict[str, Any]]:
+    """Rebuilds the segment list in the same shape TranscriptionService produces."""
+    c = _Columns(blob)
+    return [
+        {
+            "start": round(float(c.seg_start[i]), 3),
+            "end": round(float(c.seg_end[i]), 3),
+            "text": c.seg_blob[c.seg_text[i]:c.seg_text[i + 1]].decode("utf-8"),
+            "words": [c.word(j) for j in range(c.seg_words[i], c.seg_words[i + 1])],
+        }
+        for i in range(len(c.seg_start))
+    ]
+
+def words_between(blob: bytes, start: Optional[float] = None, end: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Words overlapping [start, end], selected on the packed arrays without decoding the rest."""
+    c = _Columns(blob)
+    mask = np.ones(len(c.word_start), dtype=bool)
+    if start is not None:
+        mask &= c.word_end >= start
+    if end is not None:
+        mask &= c.word_start <= end
+    return [c.word(int(i)) for i in np.flatnonzero(mask)]